@@ -12,7 +12,11 @@ import tkinter.ttk as ttk
 from tkinter.constants import *
 import os.path
 
-from src.datamodel.graphics_to_data_interface import ApplicationData
+from src.datamodel.object_permanence.importers import is_importable
+from src.graphical_interface.autosave import Autosave
+from src.graphical_interface.change_bus import ChangeBus
+from src.graphical_interface.loading import ProjectLoader
+from src.graphical_interface.resources import ResourceFrame
 
 _script = sys.argv[0]
 _location = os.path.dirname(_script)
@@ -215,6 +219,8 @@ class Toplevel1:
         self.PNotebook3_t2.configure(background="#d9d9d9")
         self.PNotebook3_t2.configure(highlightbackground="#d9d9d9")
         self.PNotebook3_t2.configure(highlightcolor="black")
+        self.resource_frame = ResourceFrame(self.PNotebook3_t2)
+        self.resource_frame.place(relx=0.0, rely=0.0, relheight=1.0, relwidth=1.0)
         PNOTEBOOK = "ClosetabNotebook"
         self.PNotebook2_1 = ttk.Notebook(self.PNotebook3_t1)
         self.PNotebook2_1.place(relx=0.0, rely=0.0, relheight=1.0, relwidth=1.0)
@@ -343,18 +349,62 @@ class Toplevel1:
             label="File",
             menu=self.sub_menu,
         )
-        self.sub_menu.add_command(
-            compound="left",
-            label="save",
-            command=lambda: ApplicationData.save(
-                tkinter.filedialog.asksaveasfilename()
-            ),
-        )
+        self.sub_menu.add_command(compound="left", label="save", command=self.save)
         self.sub_menu.add_command(compound="left", label="load", command=self.load)
 
+        self.autosave = Autosave(self.top, on_status=self.show_save_status)
+        self.loader = ProjectLoader(
+            self.top,
+            on_chunk=self.Custom1_1.refresh,
+            on_progress=self.show_load_progress,
+            on_status=self.show_load_status,
+        )
+        self.change_bus = ChangeBus(self.top)
+        self.change_bus.subscribe(self.refresh_views)
+        self.load_progress = ttk.Progressbar(self.top, mode="determinate")
+        self.load_cancel = ttk.Button(
+            self.top, text="Cancel", command=self.loader.cancel
+        )
+        self.loaded_path = None
+
+    def refresh_views(self):
+        # while loading, the loader refreshes as the tasks double, which is cheaper.
+        if not self.loader.is_loading:
+            self.Custom1_1.refresh()
+
+    def save(self):
+        path = tkinter.filedialog.asksaveasfilename()
+        if not path:
+            return
+        self.autosave.start(path)
+        self.autosave.save_now()
+
     def load(self):
-        ApplicationData.load(tkinter.filedialog.askopenfilename())
-        self.Custom1_1.reload()
+        path = tkinter.filedialog.askopenfilename()
+        if not path:
+            return
+        self.autosave.stop()
+        self.loaded_path = path
+        self.load_progress.configure(value=0)
+        self.load_progress.place(relx=0.0, rely=1.0, relwidth=0.85, anchor="sw")
+        self.load_cancel.place(relx=1.0, rely=1.0, relwidth=0.15, anchor="se")
+        self.loader.start(path)
+
+    def show_load_progress(self, loaded, total):
+        self.load_progress.configure(maximum=max(total, 1), value=loaded)
+
+    def show_load_status(self, status):
+        self.top.title(f"Toplevel 0 - {status}")
+        if status == "loading":
+            return
+        self.load_progress.place_forget()
+        self.load_cancel.place_forget()
+        # files imported from other tools are not written over.
+        if status == "loaded" and not is_importable(self.loaded_path):
+            self.autosave.start(self.loaded_path)
+
+    def show_save_status(self, status):
+        self.top.title(f"Toplevel 0 - {status}")
 
     def __adjust_sash0(self, event):
         paned = event.widget
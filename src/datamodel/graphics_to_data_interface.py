@@ -1,33 +1,356 @@
-import json
-from typing import List
+import os
+from array import array
+from contextlib import contextmanager
+from datetime import date
+from threading import Event
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-from src.datamodel.object_permanence.tasks import Task
+from src.datamodel.object_permanence.importers import import_file, is_importable
+from src.datamodel.object_permanence.json_lines import read_tasks, write_tasks
+from src.datamodel.object_permanence.snapshot import (
+    SNAPSHOT_EXTENSION,
+    is_snapshot,
+    read_snapshot,
+    write_snapshot,
+)
+from src.datamodel.object_permanence.tasks import (
+    NoChildOfItself,
+    OnlyOneParent,
+    Task,
+    TechnicalIdGen,
+)
+from src.datamodel.name_index import NameIndex
+from src.datamodel.resources import ResourcePool
+from src.datamodel.rollups import SubtreeRollups
+from src.datamodel.task_store import (
+    DEFAULT_DURATION,
+    NO_DATE,
+    CyclicDependency,
+    TaskStore,
+)
+
+DATABASE_EXTENSION = ".sqlite"
+
+
+def write_project(path: str, store: TaskStore) -> None:
+    """
+    Writes the whole store to path, as a snapshot or as JSON lines depending on the
+    extension. The file is written aside and renamed over path once on disk, so path
+    always holds a complete project.
+    """
+    temporary_path = path + ".tmp"
+    if path.endswith(SNAPSHOT_EXTENSION):
+        write_snapshot(temporary_path, store)
+    else:
+        with open(temporary_path, "w") as file:
+            write_tasks(
+                file,
+                (Task.from_store(store, technical_id) for technical_id in store),
+            )
+            file.flush()
+            os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def read_project(
+    path: str, store: TaskStore, cancelled: Optional[Event] = None
+) -> None:
+    """
+    Replaces the content of the store with the project file at path, or with the
+    tasks of a file from another tool, see importers. Once cancelled is set the
+    reading stops, leaving only part of the tasks in the store.
+    """
+    if is_snapshot(path):
+        read_snapshot(path, store)
+        return
+    if is_importable(path):
+        store.clear()
+        import_file(path, store, cancelled)
+        return
+
+    store.clear()
+    # links are only made once every task is stored, children may come after their
+    # parent. They are kept as flat (parent, child) pairs meanwhile.
+    links = array("q")
+    dependencies = array("q")
+    with open(path, "r") as file:
+        for task_data in read_tasks(file):
+            if cancelled is not None and cancelled.is_set():
+                return
+            technical_id = task_data["technical_id"]
+            store.add(technical_id, task_data["name"])
+            # files saved before tasks were scheduled have neither field.
+            start = task_data.get("start")
+            duration = task_data.get("duration", DEFAULT_DURATION)
+            if start is not None or duration != DEFAULT_DURATION:
+                store.reschedule(
+                    technical_id,
+                    NO_DATE if start is None else date.fromisoformat(start).toordinal(),
+                    duration,
+                )
+            for child in task_data["children"]:
+                links.append(technical_id)
+                links.append(child)
+            for predecessor in task_data.get("predecessors", ()):
+                dependencies.append(predecessor)
+                dependencies.append(technical_id)
+
+    for index in range(0, len(links), 2):
+        store.link(links[index], links[index + 1])
+    for index in range(0, len(dependencies), 2):
+        store.add_dependency(dependencies[index], dependencies[index + 1])
+
+
+class TaskBatch:
+    """
+    Edits of the task hierarchy made all at once, see ApplicationData.batch.
+
+    add_task, children_of and remove_child only queue the edits. commit checks them
+    all, in order and as if the previous ones were made, then makes them. If one of
+    them is invalid, it raises as Task would, and none of them is made. The views see
+    the edits as one burst of changes, so they lay out and redraw once.
+    """
+
+    def __init__(self, store: TaskStore):
+        self.store = store
+        self.tasks: List[Task] = []
+        # (parent id, child id, whether linked or unlinked), in order.
+        self.links: List[Tuple[int, int, bool]] = []
+
+    def add_task(self, task: Task) -> None:
+        self.tasks.append(task)
+
+    def children_of(self, task: Task, other_task: Task) -> None:
+        """Makes task a child of other_task."""
+        self.links.append((other_task.technical_id, task.technical_id, True))
+
+    def remove_child(self, task: Task, other_task: Task) -> None:
+        """Takes other_task from the children of task."""
+        self.links.append((task.technical_id, other_task.technical_id, False))
+
+    def commit(self) -> None:
+        self.validate()
+        tasks, links = self.tasks, self.links
+        self.tasks, self.links = [], []
+        for task in tasks:
+            task.attach(self.store)
+        for parent_id, child_id, is_linked in links:
+            if is_linked:
+                self.store.link(parent_id, child_id)
+            else:
+                self.store.unlink(parent_id, child_id)
+
+    def validate(self) -> None:
+        store = self.store
+        # parents as they will be once the edits before are made, by child id, the
+        # added tasks included.
+        parents: Dict[int, Optional[int]] = {}
+
+        def parent_of(technical_id: int) -> Optional[int]:
+            if technical_id in parents:
+                return parents[technical_id]
+            if technical_id not in store:
+                raise KeyError(technical_id)
+            return store.parent(technical_id)
+
+        def is_stored(technical_id: Optional[int]) -> bool:
+            return technical_id in parents or (
+                technical_id is not None and technical_id in store
+            )
+
+        def check_below(parent_id: int, child_id: int) -> None:
+            """Raises if child_id is parent_id or above it."""
+            if child_id == parent_id:
+                raise NoChildOfItself(f"task {child_id} cannot be its own child")
+            ancestor_id = parent_of(parent_id)
+            while ancestor_id is not None:
+                if ancestor_id == child_id:
+                    raise NoChildOfItself(f"task {child_id} is above task {parent_id}")
+                ancestor_id = parent_of(ancestor_id)
+
+        # the links Task.attach makes, to its parent then to its children.
+        for task in self.tasks:
+            if task.store is not None or is_stored(task.technical_id):
+                raise KeyError(f"task {task.technical_id} is already stored")
+            parents[task.technical_id] = (
+                task.parent if is_stored(task.parent) else None
+            )
+            for child in task.children:
+                if is_stored(child) and parent_of(child) is None:
+                    check_below(task.technical_id, child)
+                    parents[child] = task.technical_id
+            # and its dependencies. They all come from tasks stored before it, so only
+            # a task depending on itself makes a cycle.
+            predecessors = set()
+            for predecessor in task.predecessors:
+                if predecessor == task.technical_id:
+                    raise CyclicDependency(
+                        f"task {predecessor} cannot depend on itself"
+                    )
+                if predecessor in predecessors:
+                    raise ValueError(
+                        f"task {task.technical_id} already depends on task "
+                        f"{predecessor}"
+                    )
+                if is_stored(predecessor):
+                    predecessors.add(predecessor)
+
+        for parent_id, child_id, is_linked in self.links:
+            parent_of(parent_id)
+            if not is_linked:
+                if parent_of(child_id) != parent_id:
+                    raise ValueError(
+                        f"task {child_id} is not a child of task {parent_id}"
+                    )
+                parents[child_id] = None
+            elif parent_of(child_id) is not None:
+                raise OnlyOneParent(f"task {child_id} already has a parent")
+            else:
+                check_below(parent_id, child_id)
+                parents[child_id] = parent_id
 
 
 class PermanenceHandler:
+    """Keeps the tasks of the application on disk, see the object_permanence package."""
+
+    path: Optional[str] = None
+
     def save(self):
         pass
 
+    def prepare_save(self) -> Callable[[], None]:
+        """
+        Takes what the next save writes and returns the writing. Handlers whose
+        writing can run on another thread than the edits say so, see
+        JournalPermanenceHandler, the others only save when it is called.
+        """
+        return self.save
+
     def load(self):
         pass
 
+    def close(self) -> None:
+        pass
+
+    def has_unloaded_children(self, technical_id: int) -> bool:
+        """Whether some children of the task are on disk and not in the store yet."""
+        return False
+
+    def load_children(self, technical_id: int) -> None:
+        pass
+
+    def load_remaining(self) -> None:
+        """Brings every task still only on disk into the store."""
+        pass
+
 
 class ApplicationData:
-    tasks: List[Task] = []
+    tasks: TaskStore = TaskStore()
+    # where the tasks come from when they are only loaded on demand.
+    permanence: PermanenceHandler = PermanenceHandler()
+    resources: ResourcePool = ResourcePool()
+    rollups: SubtreeRollups = SubtreeRollups(tasks, resources)
+    names: NameIndex = NameIndex(tasks)
 
     @staticmethod
     def add_task(task: Task) -> None:
-        ApplicationData.tasks.append(task)
+        task.attach(ApplicationData.tasks)
+
+    @staticmethod
+    @contextmanager
+    def batch() -> Iterator[TaskBatch]:
+        """
+        Groups edits of the tasks, made together when the block ends, see TaskBatch.
+        Nothing is made if the block raises.
+        """
+        batch = TaskBatch(ApplicationData.tasks)
+        yield batch
+        batch.commit()
+
+    @staticmethod
+    def get_task(technical_id: int) -> Task:
+        if technical_id not in ApplicationData.tasks:
+            raise KeyError(technical_id)
+        return Task.from_store(ApplicationData.tasks, technical_id)
+
+    @staticmethod
+    def iter_tasks() -> Iterator[Task]:
+        for technical_id in ApplicationData.tasks:
+            yield Task.from_store(ApplicationData.tasks, technical_id)
+
+    @staticmethod
+    def has_unloaded_children(technical_id: int) -> bool:
+        return ApplicationData.permanence.has_unloaded_children(technical_id)
+
+    @staticmethod
+    def load_children(technical_id: int) -> None:
+        ApplicationData.permanence.load_children(technical_id)
+
+    @staticmethod
+    def open_database(path: str) -> PermanenceHandler:
+        """Makes the SQLite database at path the permanence of the tasks."""
+        # the database module builds on PermanenceHandler, it can only come now.
+        from src.datamodel.object_permanence.database import SqlitePermanenceHandler
+
+        permanence = ApplicationData.permanence
+        if isinstance(permanence, SqlitePermanenceHandler) and permanence.path == path:
+            return permanence
+
+        permanence.close()
+        permanence = SqlitePermanenceHandler(path, ApplicationData.tasks)
+        ApplicationData.permanence = permanence
+        return permanence
+
+    @staticmethod
+    def open_journal(path: str) -> PermanenceHandler:
+        """Makes the snapshot at path and its journal the permanence of the tasks."""
+        # as the database module, the journal one builds on PermanenceHandler.
+        from src.datamodel.object_permanence.journal import JournalPermanenceHandler
+
+        permanence = ApplicationData.permanence
+        if isinstance(permanence, JournalPermanenceHandler) and permanence.path == path:
+            return permanence
+
+        permanence.close()
+        permanence = JournalPermanenceHandler(path, ApplicationData.tasks)
+        ApplicationData.permanence = permanence
+        return permanence
+
+    @staticmethod
+    def close_database() -> None:
+        """Goes back to projects read from and written to files as a whole."""
+        ApplicationData.permanence.close()
+        ApplicationData.permanence = PermanenceHandler()
 
     @staticmethod
     def save(path: str) -> None:
-        save_data = [task.serialize() for task in ApplicationData.tasks]
+        # the tasks left in the previous database have to go into the new file too.
+        if path != ApplicationData.permanence.path:
+            ApplicationData.permanence.load_remaining()
+
+        if path.endswith(DATABASE_EXTENSION):
+            ApplicationData.open_database(path).save()
+            return
+        if path.endswith(SNAPSHOT_EXTENSION):
+            # only the edits since the last save are appended to the journal.
+            ApplicationData.open_journal(path).save()
+            return
 
-        with open(path, "w") as file:
-            json.dump(save_data, file, indent=4)
+        ApplicationData.close_database()
+        write_project(path, ApplicationData.tasks)
 
     @staticmethod
     def load(path: str) -> None:
-        with open(path, "r") as file:
-            save_data = json.load(file)
-        ApplicationData.tasks = [Task.deserialize(task_data) for task_data in save_data]
+        # assignments are to the tasks of the project replaced, and resources are not
+        # kept in its files.
+        ApplicationData.resources.clear()
+        if path.endswith(DATABASE_EXTENSION):
+            ApplicationData.open_database(path).load()
+            return
+        if path.endswith(SNAPSHOT_EXTENSION):
+            ApplicationData.open_journal(path).load()
+            return
+
+        ApplicationData.close_database()
+        read_project(path, ApplicationData.tasks)
+        TechnicalIdGen.set_minimum(ApplicationData.tasks.id_limit())
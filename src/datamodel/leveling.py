@@ -0,0 +1,195 @@
+from heapq import heapify, heappop, heappush
+from typing import Dict
+
+import numpy as np
+
+from src.datamodel.resources import ResourcePool
+from src.datamodel.scheduling import CriticalPathScheduler
+from src.datamodel.task_store import NO_DATE, TaskStore
+
+# days the usage arrays cover beyond the end of the unleveled project, at first.
+HORIZON_MARGIN = 365
+# tolerance on the units, which are floats.
+UNITS_EPSILON = 1e-9
+
+
+class ResourceLeveler:
+    """
+    Delays tasks so that their resources are never needed beyond their capacity.
+
+    This is list scheduling: tasks are taken once all their predecessors are placed,
+    the one with the earliest late start first, and each is placed on the first days
+    after its predecessors where its resources are free enough. Usage and capacity are
+    held as arrays of one row per resource and one column per day from the start of the
+    project, so finding those days only costs a few vectorized operations per
+    assignment. The arrays grow as tasks get pushed further.
+
+    A task starts no earlier than it would without leveling, see CriticalPathScheduler.
+    Tasks without resources are only delayed by their predecessors.
+    """
+
+    def __init__(self, store: TaskStore, pool: ResourcePool):
+        self.store = store
+        self.pool = pool
+        self.scheduler = CriticalPathScheduler(store)
+
+        self.first_ordinal = self.scheduler.project_start
+        self.capacities = np.zeros((0, 0))
+        self.usage = np.zeros((0, 0))
+        # leveled start of every task, by technical id.
+        self.starts: Dict[int, int] = {}
+
+    def measure(self) -> None:
+        """Fills usage from the unleveled schedule, see overallocated_days."""
+        self._reset()
+        store = self.store
+        for technical_id, units in self.pool.assignments.items():
+            if technical_id in store:
+                start = self.scheduler.dates(technical_id).early_start
+                self._book(units, start, store.duration(technical_id))
+
+    def level(self) -> Dict[int, int]:
+        """Places every task and returns their start ordinals, by technical id."""
+        self._reset()
+        store = self.store
+        scheduler = self.scheduler
+        ids = store.columns()[0]
+        rows_by_id = store.rows_by_id()
+        starts, durations = store.schedule_columns()
+        assignments = self.pool.assignments
+
+        earliest = [
+            scheduler.project_start if start == NO_DATE else start for start in starts
+        ]
+        waiting = [len(store.predecessors(technical_id)) for technical_id in ids]
+        late_starts = scheduler.late_starts.tolist()
+        ready = [
+            (late_starts[row], row) for row, count in enumerate(waiting) if not count
+        ]
+        heapify(ready)
+        self.starts = {}
+        while ready:
+            _, row = heappop(ready)
+            technical_id = ids[row]
+            start = earliest[row]
+            duration = durations[row]
+            units = assignments.get(technical_id)
+            if units and duration > 0:
+                start = self._place(units, start, duration)
+                self._book(units, start, duration)
+            self.starts[technical_id] = start
+
+            finish = start + duration
+            for successor_id in store.successors(technical_id):
+                successor_row = rows_by_id[successor_id]
+                earliest[successor_row] = max(earliest[successor_row], finish)
+                waiting[successor_row] -= 1
+                if not waiting[successor_row]:
+                    heappush(ready, (late_starts[successor_row], successor_row))
+        return dict(self.starts)
+
+    def apply(self) -> None:
+        """
+        Moves the scheduled tasks to their leveled start. Tasks without a start of
+        their own only get one when leveling delayed them.
+        """
+        store = self.store
+        moved = [
+            (technical_id, start)
+            for technical_id, start in self.starts.items()
+            if start != store.start(technical_id)
+            and (
+                store.start(technical_id) != NO_DATE
+                or start > self.scheduler.dates(technical_id).early_start
+            )
+        ]
+        for technical_id, start in moved:
+            store.reschedule(technical_id, start, store.duration(technical_id))
+
+    def overallocated_days(self) -> np.ndarray:
+        """Number of days every resource is needed beyond its capacity."""
+        excess = self.usage > self.capacities + UNITS_EPSILON
+        return np.count_nonzero(excess & (self.capacities > 0), axis=1)
+
+    def _reset(self) -> None:
+        self.scheduler.schedule()
+        self.first_ordinal = self.scheduler.project_start
+        day_count = self.scheduler.project_finish - self.first_ordinal + HORIZON_MARGIN
+        self.capacities = capacities(self.pool, self.first_ordinal, day_count)
+        self.usage = np.zeros_like(self.capacities)
+
+    def _reserve(self, day_count: int) -> None:
+        """Makes the arrays cover the day_count first days at least."""
+        covered = self.usage.shape[1]
+        if day_count <= covered:
+            return
+        day_count = max(day_count, 2 * covered)
+        self.capacities = np.hstack(
+            (
+                self.capacities,
+                capacities(
+                    self.pool, self.first_ordinal + covered, day_count - covered
+                ),
+            )
+        )
+        self.usage = np.hstack(
+            (self.usage, np.zeros((len(self.pool), day_count - covered)))
+        )
+
+    def _place(self, units: Dict[int, float], start: int, duration: int) -> int:
+        """
+        First start from start on where the units are free for duration days. Raises
+        ValueError if a resource never has the units needed, the search would not end.
+        """
+        for index, needed in units.items():
+            resource = self.pool.resources[index]
+            if needed > resource.capacity + UNITS_EPSILON and any(
+                resource.working_days
+            ):
+                raise ValueError(
+                    f"{resource.name} never has {needed} units available on a day"
+                )
+        day = start - self.first_ordinal
+        # days looked at together, wider than the task for it to fit often at once.
+        window = max(4 * duration, 64)
+        while True:
+            self._reserve(day + window)
+            days = slice(day, day + window)
+            is_busy = np.zeros(window, dtype=bool)
+            for index, needed in units.items():
+                available = self.capacities[index, days]
+                is_busy |= (available > 0) & (
+                    self.usage[index, days] + needed > available + UNITS_EPSILON
+                )
+            busy_counts = np.concatenate(([0], np.cumsum(is_busy)))
+            fits = np.flatnonzero(busy_counts[duration:] == busy_counts[:-duration])
+            if fits.size:
+                return self.first_ordinal + day + int(fits[0])
+            day += window - duration + 1
+
+    def _book(self, units: Dict[int, float], start: int, duration: int) -> None:
+        day = start - self.first_ordinal
+        self._reserve(day + duration)
+        days = slice(day, day + duration)
+        for index, needed in units.items():
+            self.usage[index, days] += needed * (self.capacities[index, days] > 0)
+
+
+def capacities(pool: ResourcePool, first_ordinal: int, day_count: int) -> np.ndarray:
+    """Units available of every resource, on every day from first_ordinal on."""
+    if not pool.resources:
+        return np.zeros((0, day_count))
+
+    ordinals = np.arange(first_ordinal, first_ordinal + day_count)
+    # the first ordinal is a monday.
+    weekdays = (ordinals - 1) % 7
+    working_days = np.array([resource.working_days for resource in pool.resources])
+    capacity = np.array(
+        [resource.capacity for resource in pool.resources], dtype=np.float64
+    )
+    available = capacity[:, None] * working_days[:, weekdays]
+    for index, resource in enumerate(pool.resources):
+        for ordinal in resource.days_off:
+            if first_ordinal <= ordinal < first_ordinal + day_count:
+                available[index, ordinal - first_ordinal] = 0
+    return available
@@ -0,0 +1,117 @@
+from typing import Dict, Iterator, List, Optional, Set
+
+from src.datamodel.task_store import TaskStore, TaskStoreListener
+
+# marks the start of every name, so that prefixes have trigrams of their own.
+NAME_START = "\x02"
+
+
+class NameIndex(TaskStoreListener):
+    """
+    Finds tasks by a part of their name, whatever the case.
+
+    Every name is cut into the trigrams of its case folded form, preceded by
+    NAME_START, and the technical ids of the tasks are kept by trigram. A query only
+    looks at the tasks holding all its trigrams, starting from the rarest one, and
+    checks those. Queries too short to have a trigram scan the names instead, which
+    is still fast for the few keys typed first.
+
+    The index is built on the first query, then follows the tasks added and renamed,
+    through TaskWindow.modify_task or otherwise.
+    """
+
+    def __init__(self, store: TaskStore):
+        self.store = store
+        # case folded names and the tasks holding every trigram, None until needed.
+        self._names: Optional[Dict[int, str]] = None
+        self._postings: Dict[str, Set[int]] = {}
+        store.subscribe(self)
+
+    def search(
+        self, text: str, prefix: bool = False, limit: Optional[int] = None
+    ) -> List[int]:
+        """
+        Technical ids of the tasks whose name holds text, or starts with it, in
+        increasing order. Only the limit first are returned when it is given.
+        """
+        self._build()
+        text = text.casefold()
+        if not text:
+            return []
+        key = NAME_START + text if prefix else text
+        if len(key) < 3:
+            candidates = self._names.keys()
+        else:
+            postings = sorted(
+                (self._postings.get(trigram, ()) for trigram in set(_trigrams(key))),
+                key=len,
+            )
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(posting)
+            # holding the only trigram of the key is holding the key.
+            if len(key) == 3:
+                matches = sorted(candidates)
+                return matches if limit is None else matches[:limit]
+
+        names = self._names
+        if prefix:
+            matches = sorted(
+                technical_id
+                for technical_id in candidates
+                if names[technical_id].startswith(text)
+            )
+        else:
+            matches = sorted(
+                technical_id
+                for technical_id in candidates
+                if text in names[technical_id]
+            )
+        return matches if limit is None else matches[:limit]
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        if self._names is not None:
+            self._add(technical_id, name.casefold())
+
+    def task_renamed(self, technical_id: int, name: str) -> None:
+        if self._names is None:
+            return
+        for trigram in set(_trigrams(NAME_START + self._names[technical_id])):
+            posting = self._postings[trigram]
+            posting.discard(technical_id)
+            if not posting:
+                del self._postings[trigram]
+        self._add(technical_id, name.casefold())
+
+    def store_cleared(self) -> None:
+        self._names = None
+        self._postings = {}
+
+    def _add(self, technical_id: int, name: str) -> None:
+        self._names[technical_id] = name
+        postings = self._postings
+        for trigram in set(_trigrams(NAME_START + name)):
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = set()
+            posting.add(technical_id)
+
+    def _build(self) -> None:
+        if self._names is not None:
+            return
+        self._names = {}
+        ids, _, names, strings = self.store.columns()
+        # tasks often share names, each string is only folded once.
+        folded: Dict[int, str] = {}
+        for technical_id, string_index in zip(ids, names):
+            name = folded.get(string_index)
+            if name is None:
+                name = folded[string_index] = strings[string_index].casefold()
+            self._add(technical_id, name)
+
+
+def _trigrams(text: str) -> Iterator[str]:
+    for start in range(len(text) - 2):
+        yield text[start : start + 3]
@@ -0,0 +1,246 @@
+import sqlite3
+from typing import Any, List, Set, Tuple
+
+from src.datamodel.graphics_to_data_interface import PermanenceHandler
+from src.datamodel.object_permanence.tasks import TechnicalIdGen
+from src.datamodel.task_store import (
+    DEFAULT_DURATION,
+    NO_DATE,
+    TaskStore,
+    TaskStoreListener,
+)
+
+# pending changes go to the open transaction once there are this many of them.
+BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    technical_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    parent INTEGER,
+    position INTEGER NOT NULL DEFAULT 0,
+    start INTEGER NOT NULL DEFAULT 0,
+    duration INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS tasks_by_parent ON tasks (parent, position);
+CREATE TABLE IF NOT EXISTS dependencies (
+    predecessor INTEGER NOT NULL,
+    successor INTEGER NOT NULL,
+    PRIMARY KEY (predecessor, successor)
+);
+CREATE INDEX IF NOT EXISTS dependencies_by_successor ON dependencies (successor);
+"""
+
+INSERT = "INSERT INTO tasks (technical_id, name) VALUES (?, ?)"
+RENAME = "UPDATE tasks SET name = ? WHERE technical_id = ?"
+RESCHEDULE = "UPDATE tasks SET start = ?, duration = ? WHERE technical_id = ?"
+LINK = """
+UPDATE tasks
+SET parent = ?1,
+    position = (SELECT COALESCE(MAX(position), -1) + 1 FROM tasks WHERE parent = ?1)
+WHERE technical_id = ?2
+"""
+UNLINK = "UPDATE tasks SET parent = NULL, position = 0 WHERE technical_id = ?2"
+DEPEND = "INSERT INTO dependencies (predecessor, successor) VALUES (?, ?)"
+UNDEPEND = "DELETE FROM dependencies WHERE predecessor = ? AND successor = ?"
+SELECT_DEPENDENCIES = """
+SELECT predecessor, successor FROM dependencies WHERE predecessor = ?1
+UNION SELECT predecessor, successor FROM dependencies WHERE successor = ?1
+"""
+SELECT_CHILDREN = """
+SELECT technical_id, name, start, duration,
+    EXISTS (SELECT 1 FROM tasks AS child WHERE child.parent = task.technical_id)
+FROM tasks AS task
+WHERE parent IS ? ORDER BY position, technical_id
+"""
+
+
+class SqlitePermanenceHandler(PermanenceHandler, TaskStoreListener):
+    """
+    Keeps a project in a SQLite database, indexed by technical id and by parent.
+
+    load only brings the root tasks into the store, the children of a task are brought
+    on demand by load_children. The changes made to the store are queued and written
+    in batches to a transaction left open, which save commits. Until then they are not
+    in the file, and closing or loading the database again drops them.
+    """
+
+    def __init__(self, path: str, store: TaskStore):
+        self.path = path
+        self.store = store
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        columns = self.connection.execute("PRAGMA table_info(tasks)").fetchall()
+        # databases written before tasks were scheduled.
+        if "start" not in [column[1] for column in columns]:
+            with self.connection:
+                self.connection.execute(
+                    "ALTER TABLE tasks ADD COLUMN start INTEGER NOT NULL DEFAULT 0"
+                )
+                self.connection.execute(
+                    "ALTER TABLE tasks ADD COLUMN duration INTEGER NOT NULL DEFAULT 1"
+                )
+
+        self.pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        # tasks of the store whose children are still only in the database.
+        self.unloaded: Set[int] = set()
+        self.needs_full_write = True
+        self.store.subscribe(self)
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        self._record(INSERT, (technical_id, name))
+
+    def task_renamed(self, technical_id: int, name: str) -> None:
+        self._record(RENAME, (name, technical_id))
+
+    def task_linked(self, parent_id: int, child_id: int) -> None:
+        self._record(LINK, (parent_id, child_id))
+
+    def task_unlinked(self, parent_id: int, child_id: int) -> None:
+        self._record(UNLINK, (parent_id, child_id))
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        self._record(RESCHEDULE, (start, duration, technical_id))
+
+    def dependency_added(self, predecessor_id: int, successor_id: int) -> None:
+        self._record(DEPEND, (predecessor_id, successor_id))
+
+    def dependency_removed(self, predecessor_id: int, successor_id: int) -> None:
+        self._record(UNDEPEND, (predecessor_id, successor_id))
+
+    def store_cleared(self) -> None:
+        self.pending.clear()
+        self.unloaded.clear()
+        self.needs_full_write = True
+
+    def _record(self, statement: str, parameters: Tuple[Any, ...]) -> None:
+        if self.needs_full_write:
+            return
+        self.pending.append((statement, parameters))
+        if len(self.pending) >= BATCH_SIZE:
+            self._flush()
+
+    def save(self) -> None:
+        if self.needs_full_write:
+            self._write_all()
+            return
+        self._flush()
+        self.connection.commit()
+
+    def _flush(self) -> None:
+        """Writes the pending changes to the open transaction, without committing."""
+        # consecutive changes of the same kind go to the database together.
+        start = 0
+        while start < len(self.pending):
+            statement = self.pending[start][0]
+            end = start
+            while end < len(self.pending) and self.pending[end][0] == statement:
+                end += 1
+            self.connection.executemany(
+                statement, [parameters for _, parameters in self.pending[start:end]]
+            )
+            start = end
+        self.pending.clear()
+
+    def _write_all(self) -> None:
+        ids, _, names, strings = self.store.columns()
+        with self.connection:
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.executemany(
+                INSERT,
+                zip(ids, (strings[name] for name in names)),
+            )
+            self.connection.executemany(
+                RESCHEDULE, zip(*self.store.schedule_columns(), ids)
+            )
+            self.connection.execute("DELETE FROM dependencies")
+            self.connection.executemany(
+                DEPEND, zip(*self.store.dependency_columns())
+            )
+            self.connection.executemany(
+                "UPDATE tasks SET parent = ?, position = ? WHERE technical_id = ?",
+                (
+                    (technical_id, position, child)
+                    for technical_id in self.store
+                    for position, child in enumerate(
+                        self.store.iter_children(technical_id)
+                    )
+                ),
+            )
+        self.pending.clear()
+        self.unloaded.clear()
+        self.needs_full_write = False
+
+    def load(self) -> None:
+        """Replaces the content of the store with the root tasks of the database."""
+        self.connection.rollback()
+        self.store.unsubscribe(self)
+        try:
+            self.store.clear()
+            self.pending.clear()
+            self.unloaded.clear()
+            self._add_children(None)
+        finally:
+            self.store.subscribe(self)
+
+        (id_limit,) = self.connection.execute(
+            "SELECT COALESCE(MAX(technical_id), -1) + 1 FROM tasks"
+        ).fetchone()
+        TechnicalIdGen.set_minimum(id_limit)
+        self.needs_full_write = False
+
+    def close(self) -> None:
+        """Drops the changes made since the last save."""
+        self.store.unsubscribe(self)
+        self.connection.rollback()
+        self.connection.close()
+
+    def has_unloaded_children(self, technical_id: int) -> bool:
+        return technical_id in self.unloaded
+
+    def load_children(self, technical_id: int) -> None:
+        """Brings the children of a task from the database into the store."""
+        if technical_id not in self.unloaded:
+            return
+
+        # the database has to know about the children linked since the last save,
+        # which the open transaction shows without putting them in the file.
+        self._flush()
+        self.store.unsubscribe(self)
+        try:
+            # children linked meanwhile are put back at their place among the others.
+            for child in self.store.children(technical_id):
+                self.store.unlink(technical_id, child)
+            self._add_children(technical_id)
+        finally:
+            self.store.subscribe(self)
+        self.unloaded.discard(technical_id)
+
+    def load_remaining(self) -> None:
+        while self.unloaded:
+            self.load_children(next(iter(self.unloaded)))
+
+    def _add_children(self, parent_id: Any) -> None:
+        added = []
+        rows = self.connection.execute(SELECT_CHILDREN, (parent_id,))
+        for technical_id, name, start, duration, has_children in rows:
+            if technical_id not in self.store:
+                self.store.add(technical_id, name)
+                added.append(technical_id)
+                if start != NO_DATE or duration != DEFAULT_DURATION:
+                    self.store.reschedule(technical_id, start, duration)
+                if has_children:
+                    self.unloaded.add(technical_id)
+            if parent_id is not None:
+                self.store.link(parent_id, technical_id)
+
+        # dependencies are only in the store once both of their ends are.
+        for technical_id in added:
+            rows = self.connection.execute(SELECT_DEPENDENCIES, (technical_id,))
+            for predecessor_id, successor_id in rows:
+                if (
+                    predecessor_id in self.store
+                    and successor_id in self.store
+                    and successor_id not in self.store.successors(predecessor_id)
+                ):
+                    self.store.add_dependency(predecessor_id, successor_id)
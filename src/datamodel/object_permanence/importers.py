@@ -0,0 +1,294 @@
+import csv
+import math
+import re
+from array import array
+from datetime import date
+from threading import Event
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO
+from xml.etree.ElementTree import ParseError, iterparse
+
+from src.datamodel.object_permanence.tasks import TechnicalIdGen
+from src.datamodel.task_store import DEFAULT_DURATION, NO_DATE, TaskStore
+
+OUTLINE_EXTENSIONS = (".txt", ".outline")
+CSV_EXTENSION = ".csv"
+MS_PROJECT_EXTENSION = ".xml"
+IMPORT_EXTENSIONS = OUTLINE_EXTENSIONS + (CSV_EXTENSION, MS_PROJECT_EXTENSION)
+
+# technical ids taken from TechnicalIdGen at once.
+ID_BLOCK_SIZE = 4096
+TAB_SIZE = 4
+# working hours in a day of MS Project durations.
+HOURS_PER_DAY = 8
+
+BULLET = re.compile(r"[-*+]\s+")
+ID_SEPARATORS = re.compile(r"[\s,;]+")
+MS_PROJECT_DURATION = re.compile(r"PT(\d+)H(\d+)M(\d+)S")
+
+
+class SourceIds:
+    """
+    Technical ids for the tasks of an imported file, taken from TechnicalIdGen a block
+    at a time. Ids used by the file are mapped to the same technical id, whether the
+    task they name comes before or after the reference.
+    """
+
+    def __init__(self, block_size: int = ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self.mapped: Dict[str, int] = {}
+        self._block = iter(())
+
+    def next_id(self) -> int:
+        technical_id = next(self._block, None)
+        if technical_id is None:
+            self._block = iter(TechnicalIdGen.reserve(self.block_size))
+            technical_id = next(self._block)
+        return technical_id
+
+    def technical_id(self, source_id: str) -> int:
+        technical_id = self.mapped.get(source_id)
+        if technical_id is None:
+            technical_id = self.mapped[source_id] = self.next_id()
+        return technical_id
+
+
+def is_importable(path: str) -> bool:
+    return path.lower().endswith(IMPORT_EXTENSIONS)
+
+
+def import_file(path: str, store: TaskStore, cancelled: Optional[Event] = None) -> None:
+    """
+    Adds the tasks of a file from another tool to the store. A file that can not be
+    parsed raises ValueError, as the project files do.
+    """
+    lowered = path.lower()
+    try:
+        if lowered.endswith(MS_PROJECT_EXTENSION):
+            with open(path, "rb") as file:
+                import_tasks(read_ms_project(file), store, cancelled)
+        elif lowered.endswith(CSV_EXTENSION):
+            with open(path, "r", newline="") as file:
+                import_tasks(read_csv(file), store, cancelled)
+        else:
+            with open(path, "r") as file:
+                import_tasks(read_outline(file), store, cancelled)
+    except (ParseError, csv.Error) as error:
+        raise ValueError(f"{path}: {error}") from error
+
+
+def import_tasks(
+    records: Iterable[Dict[str, Any]],
+    store: TaskStore,
+    cancelled: Optional[Event] = None,
+) -> None:
+    """
+    Adds the tasks yielded by the readers below to the store. They only give the parent
+    of every task, links and dependencies are made once all the tasks are stored.
+    Those to tasks the file does not hold are left out. Once cancelled is set nothing
+    more is added. A task whose id an earlier one has raises ValueError.
+    """
+    links = array("q")
+    dependencies = array("q")
+    for record in records:
+        if cancelled is not None and cancelled.is_set():
+            return
+        technical_id = record["technical_id"]
+        try:
+            store.add(technical_id, record["name"])
+        except KeyError as error:
+            raise ValueError(f"duplicate id for task {record['name']!r}") from error
+        start = record["start"]
+        duration = record["duration"]
+        if start is not None or duration != DEFAULT_DURATION:
+            store.reschedule(
+                technical_id,
+                NO_DATE if start is None else date.fromisoformat(start).toordinal(),
+                duration,
+            )
+        if record["parent"] is not None:
+            links.append(record["parent"])
+            links.append(technical_id)
+        for predecessor in record["predecessors"]:
+            dependencies.append(predecessor)
+            dependencies.append(technical_id)
+
+    for index in range(0, len(links), 2):
+        if links[index] in store:
+            store.link(links[index], links[index + 1])
+    for index in range(0, len(dependencies), 2):
+        if dependencies[index] in store:
+            store.add_dependency(dependencies[index], dependencies[index + 1])
+
+
+def read_outline(file: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one task per non blank line, child of the closest line above it that is
+    less indented. A leading bullet is dropped. Only the lines above the current one
+    at each level are remembered.
+    """
+    ids = SourceIds()
+    # indent and technical id of the last task of every level down to the current.
+    indents: List[int] = []
+    parents: List[int] = []
+    for line in file:
+        text = line.rstrip("\r\n").expandtabs(TAB_SIZE)
+        name = text.lstrip()
+        if not name:
+            continue
+        indent = len(text) - len(name)
+        while indents and indents[-1] >= indent:
+            indents.pop()
+            parents.pop()
+
+        technical_id = ids.next_id()
+        yield _record(
+            technical_id,
+            BULLET.sub("", name, count=1),
+            parents[-1] if parents else None,
+        )
+        indents.append(indent)
+        parents.append(technical_id)
+
+
+def read_csv(
+    file: TextIO,
+    id_column: str = "id",
+    name_column: str = "name",
+    parent_column: str = "parent",
+    start_column: str = "start",
+    duration_column: str = "duration",
+    predecessors_column: str = "predecessors",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one task per row. Parents and predecessors are given by their value in the
+    id column, and may come after the rows naming them. Starts are ISO dates,
+    durations are in days and predecessors are separated by commas, semicolons or
+    spaces. Only the id column and the name column are required.
+    """
+    ids = SourceIds()
+    reader = csv.DictReader(file)
+    for column in (id_column, name_column):
+        if column not in (reader.fieldnames or ()):
+            raise ValueError(f"no {column} column")
+    for row in reader:
+        # short rows hold None for the columns they lack.
+        source_id = (row[id_column] or "").strip()
+        if not source_id:
+            raise ValueError(f"no {id_column} on line {reader.line_num}")
+        parent = (row.get(parent_column) or "").strip()
+        start = (row.get(start_column) or "").strip()
+        duration = (row.get(duration_column) or "").strip()
+        yield _record(
+            ids.technical_id(source_id),
+            row[name_column] or "",
+            ids.technical_id(parent) if parent else None,
+            date.fromisoformat(start[:10]) if start else None,
+            int(duration) if duration else DEFAULT_DURATION,
+            [
+                ids.technical_id(predecessor)
+                for predecessor in ID_SEPARATORS.split(
+                    row.get(predecessors_column) or ""
+                )
+                if predecessor
+            ],
+        )
+
+
+def read_ms_project(file: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the tasks of an MS Project XML file, nested by their outline level. Every
+    task element is dropped once read, so the document is never held whole. Durations
+    are rounded up to whole days of HOURS_PER_DAY hours.
+    """
+    ids = SourceIds()
+    levels: List[int] = []
+    parents: List[int] = []
+    tasks_element = None
+    for event, element in iterparse(file, events=("start", "end")):
+        tag = _local_name(element.tag)
+        if event == "start":
+            if tag == "Tasks":
+                tasks_element = element
+            continue
+        if tag != "Task":
+            continue
+
+        fields = {_local_name(child.tag): child for child in element}
+        level = int(_text(fields, "OutlineLevel") or 1)
+        is_null = _text(fields, "IsNull") == "1"
+        unique_id = _text(fields, "UID")
+        name = _text(fields, "Name") or ""
+        start = _text(fields, "Start")
+        duration = _ms_project_days(_text(fields, "Duration"))
+        predecessors = [
+            _text({_local_name(field.tag): field for field in link}, "PredecessorUID")
+            for link in element
+            if _local_name(link.tag) == "PredecessorLink"
+        ]
+        if tasks_element is not None:
+            tasks_element.clear()
+        else:
+            element.clear()
+        # the outline level 0 task sums up the whole project.
+        if level == 0 or is_null or unique_id is None:
+            continue
+
+        while levels and levels[-1] >= level:
+            levels.pop()
+            parents.pop()
+        technical_id = ids.technical_id(unique_id)
+        yield _record(
+            technical_id,
+            name,
+            parents[-1] if parents else None,
+            date.fromisoformat(start[:10]) if start else None,
+            duration,
+            [
+                ids.technical_id(predecessor)
+                for predecessor in predecessors
+                if predecessor
+            ],
+        )
+        levels.append(level)
+        parents.append(technical_id)
+
+
+def _record(
+    technical_id: int,
+    name: str,
+    parent: Optional[int],
+    start: Optional[date] = None,
+    duration: int = DEFAULT_DURATION,
+    predecessors: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """A task as Task.serialize gives it, without its children."""
+    return {
+        "name": name,
+        "children": [],
+        "parent": parent,
+        "technical_id": technical_id,
+        "start": None if start is None else start.isoformat(),
+        "duration": duration,
+        "predecessors": predecessors or [],
+    }
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _text(fields: Dict[str, Any], name: str) -> Optional[str]:
+    field = fields.get(name)
+    if field is None or field.text is None:
+        return None
+    return field.text.strip()
+
+
+def _ms_project_days(duration: Optional[str]) -> int:
+    if not duration:
+        return DEFAULT_DURATION
+    match = MS_PROJECT_DURATION.fullmatch(duration)
+    if match is None:
+        raise ValueError(f"unknown duration {duration}")
+    hours, minutes, seconds = map(int, match.groups())
+    return math.ceil((hours + minutes / 60 + seconds / 3600) / HOURS_PER_DAY)
@@ -0,0 +1,198 @@
+import json
+import os
+from functools import partial
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.datamodel.graphics_to_data_interface import PermanenceHandler
+from src.datamodel.object_permanence.snapshot import read_snapshot, write_snapshot
+from src.datamodel.object_permanence.tasks import TechnicalIdGen
+from src.datamodel.task_store import TaskStore, TaskStoreListener
+
+JOURNAL_SUFFIX = ".journal"
+
+# the journal is folded into a new snapshot once it holds more entries than there are
+# tasks in the project, and at least this many.
+COMPACTION_MINIMUM = 1000
+
+
+class JournalPermanenceHandler(PermanenceHandler, TaskStoreListener):
+    """
+    Keeps a project as a snapshot plus an append-only journal of the changes made to
+    the store since that snapshot.
+
+    Saving only appends the changes made since the previous save, so it costs as much
+    as the edits and not as the project. The journal starts with the generation of
+    the snapshot it applies to, which tells a journal already folded into a newer
+    snapshot apart after an interrupted compaction, whatever is done to the files
+    meanwhile.
+    """
+
+    def __init__(self, path: str, store: TaskStore):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.store = store
+
+        self.pending: List[List[Any]] = []
+        self.journal_length = 0
+        self.needs_snapshot = True
+        self.store.subscribe(self)
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        self._record(["add", technical_id, name])
+
+    def task_renamed(self, technical_id: int, name: str) -> None:
+        self._record(["rename", technical_id, name])
+
+    def task_linked(self, parent_id: int, child_id: int) -> None:
+        self._record(["link", parent_id, child_id])
+
+    def task_unlinked(self, parent_id: int, child_id: int) -> None:
+        self._record(["unlink", parent_id, child_id])
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        self._record(["schedule", technical_id, start, duration])
+
+    def dependency_added(self, predecessor_id: int, successor_id: int) -> None:
+        self._record(["depend", predecessor_id, successor_id])
+
+    def dependency_removed(self, predecessor_id: int, successor_id: int) -> None:
+        self._record(["undepend", predecessor_id, successor_id])
+
+    def store_cleared(self) -> None:
+        self.pending.clear()
+        self.needs_snapshot = True
+
+    def _record(self, entry: List[Any]) -> None:
+        # everything is written anew by the next snapshot anyway.
+        if not self.needs_snapshot:
+            self.pending.append(entry)
+
+    def save(self) -> None:
+        self.prepare_save()()
+
+    def prepare_save(self) -> Callable[[], None]:
+        """
+        Takes what the next save writes, the edits made since the last one or a copy
+        of the whole store, and returns the writing. The writing may run on another
+        thread, one at a time, while the store is edited. If it fails, the next save
+        writes a whole snapshot again.
+        """
+        journal_length = self.journal_length + len(self.pending)
+        journal_limit = max(COMPACTION_MINIMUM, len(self.store))
+        if self.needs_snapshot or journal_length > journal_limit:
+            write = partial(self._write_snapshot, self.store.copy())
+            self.journal_length = 0
+        else:
+            write = partial(self._append, self.pending)
+            self.journal_length = journal_length
+        self.pending = []
+        self.needs_snapshot = False
+
+        def write_or_rewrite() -> None:
+            try:
+                write()
+            except BaseException:
+                self.needs_snapshot = True
+                raise
+
+        return write_or_rewrite
+
+    def compact(self) -> None:
+        """Writes the whole store as a new snapshot and starts an empty journal."""
+        self.needs_snapshot = True
+        self.save()
+
+    def _append(self, entries: List[List[Any]]) -> None:
+        if not entries:
+            return
+        with open(self.journal_path, "a") as file:
+            for entry in entries:
+                file.write(json.dumps(entry, separators=(",", ":")))
+                file.write("\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _write_snapshot(self, store: TaskStore) -> None:
+        temporary_path = self.path + ".tmp"
+        generation = write_snapshot(temporary_path, store)
+        os.replace(temporary_path, self.path)
+
+        temporary_path = self.journal_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            file.write(json.dumps(["snapshot", generation]))
+            file.write("\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.journal_path)
+
+    def load(self) -> None:
+        """Replaces the content of the store by the snapshot and replays the journal."""
+        self.store.unsubscribe(self)
+        try:
+            entries = None
+            is_intact = False
+            generation = None
+            if os.path.exists(self.path):
+                generation = read_snapshot(self.path, self.store)
+                entries, is_intact = self._read_journal(generation)
+            else:
+                self.store.clear()
+
+            operations = {
+                "add": self.store.add,
+                "rename": self.store.rename,
+                "link": self.store.link,
+                "unlink": self.store.unlink,
+                "schedule": self.store.reschedule,
+                "depend": self.store.add_dependency,
+                "undepend": self.store.remove_dependency,
+            }
+            for operation, *arguments in entries or []:
+                operations[operation](*arguments)
+        finally:
+            self.store.subscribe(self)
+
+        TechnicalIdGen.set_minimum(self.store.id_limit())
+        self.pending.clear()
+        self.journal_length = len(entries or [])
+        # nothing can be appended after a torn entry, it has to be rewritten, nor to
+        # the journal of a snapshot without generation.
+        self.needs_snapshot = not is_intact or generation is None
+
+    def close(self) -> None:
+        self.store.unsubscribe(self)
+
+    def _read_journal(
+        self, generation: Optional[int]
+    ) -> Tuple[Optional[List[List[Any]]], bool]:
+        """
+        Returns the entries of the journal, None if there is no journal matching the
+        snapshot of the generation given, and whether the journal is intact. A last
+        entry torn by a crash while appending is left out. Snapshots written before
+        they had a generation are matched by their size and modification time.
+        """
+        if not os.path.exists(self.journal_path):
+            return None, False
+
+        entries = []
+        with open(self.journal_path, "r") as file:
+            header = file.readline()
+            try:
+                operation, *signature = json.loads(header)
+            except json.JSONDecodeError:
+                return None, False
+            if operation != "snapshot":
+                return None, False
+            if generation is None:
+                stat = os.stat(self.path)
+                if tuple(signature) != (stat.st_size, stat.st_mtime_ns):
+                    return None, False
+            elif signature != [generation]:
+                return None, False
+
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    return entries, False
+        return entries, True
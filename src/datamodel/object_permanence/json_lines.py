@@ -0,0 +1,60 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, TextIO
+
+from src.datamodel.object_permanence.tasks import Task
+
+CHUNK_SIZE = 1 << 16
+SEPARATORS = " \t\r\n"
+
+
+def write_tasks(file: TextIO, tasks: Iterable[Task]) -> None:
+    """Writes one compact JSON object per line, encoding the tasks one at a time."""
+    for task in tasks:
+        file.write(json.dumps(task.serialize(), separators=(",", ":")))
+        file.write("\n")
+
+
+def read_tasks(file: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the serialized tasks of a file one at a time. The file is either in the JSON
+    lines layout written by write_tasks or a JSON array of tasks, as saved by previous
+    versions. Only a chunk of the file and the task being decoded are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    is_array = None
+    separators = SEPARATORS
+
+    while True:
+        while position < len(buffer) and buffer[position] in separators:
+            position += 1
+
+        if position == len(buffer):
+            buffer = file.read(CHUNK_SIZE)
+            position = 0
+            if not buffer:
+                return
+            continue
+
+        if is_array is None:
+            is_array = buffer[position] == "["
+            if is_array:
+                separators = SEPARATORS + ","
+                position += 1
+            continue
+
+        if is_array and buffer[position] == "]":
+            return
+
+        try:
+            task_data, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        yield task_data
@@ -0,0 +1,171 @@
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Optional, Tuple
+
+from src.datamodel.task_store import TaskStore
+
+MAGIC = b"PYPJ"
+VERSION = 4
+SNAPSHOT_EXTENSION = ".pyproj"
+
+# magic, version, number of tasks, number of links, number of strings, id limit.
+HEADER = struct.Struct("<4sIQQQQ")
+# random generation telling this snapshot from the others, from version 4 on.
+GENERATION_HEADER = struct.Struct("<Q")
+# number of dependencies, from version 3 on.
+DEPENDENCY_HEADER = struct.Struct("<Q")
+
+
+def is_snapshot(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def write_snapshot(path: str, store: TaskStore) -> int:
+    """
+    Writes the store under a new random generation, which is returned, as fixed-width
+    little endian columns, in this order: technical ids, parent rows and name indexes
+    of every task, the children of every task in compressed sparse row layout
+    (offsets then rows), the row of every technical id, the start and duration of
+    every task, the number of dependencies followed by their predecessor and
+    successor ids, and the string table (offsets in characters then the utf-8 text of
+    all the strings put end to end).
+    """
+    ids, parents, names, strings = store.columns()
+    child_offsets, child_rows = store.child_index()
+    starts, durations = store.schedule_columns()
+    predecessors, successors = store.dependency_columns()
+
+    string_offsets = array("q", [0])
+    length = 0
+    for string in strings:
+        length += len(string)
+        string_offsets.append(length)
+
+    generation = random.getrandbits(64)
+    with open(path, "wb") as file:
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(ids),
+                len(child_rows),
+                len(strings),
+                store.id_limit(),
+            )
+        )
+        file.write(GENERATION_HEADER.pack(generation))
+        for column in (
+            ids,
+            parents,
+            names,
+            child_offsets,
+            child_rows,
+            store.rows_by_id(),
+            starts,
+            durations,
+        ):
+            _write_array(file, column)
+        file.write(DEPENDENCY_HEADER.pack(len(predecessors)))
+        for column in (predecessors, successors, string_offsets):
+            _write_array(file, column)
+        file.write("".join(strings).encode("utf-8"))
+        file.flush()
+        os.fsync(file.fileno())
+    return generation
+
+
+def read_snapshot(path: str, store: TaskStore) -> Optional[int]:
+    """
+    Replaces the content of store with the snapshot, read through a memory map.
+    Returns the generation of the snapshot, None for those written before version 4.
+    """
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        view = memoryview(mapped)
+        try:
+            (
+                magic,
+                version,
+                task_count,
+                link_count,
+                string_count,
+                id_limit,
+            ) = HEADER.unpack_from(view)
+            # version 1 snapshots were written before tasks were scheduled, version 2
+            # before they had dependencies and version 3 before their generation.
+            if magic != MAGIC or version not in (1, 2, 3, VERSION):
+                raise ValueError(f"{path} is not a version {VERSION} snapshot")
+
+            position = HEADER.size
+            generation = None
+            if version > 3:
+                (generation,) = GENERATION_HEADER.unpack_from(view, position)
+                position += GENERATION_HEADER.size
+            ids, position = _read_array(view, position, "q", task_count)
+            parents, position = _read_array(view, position, "q", task_count)
+            names, position = _read_array(view, position, "i", task_count)
+            child_offsets, position = _read_array(view, position, "q", task_count + 1)
+            child_rows, position = _read_array(view, position, "q", link_count)
+            rows_by_id, position = _read_array(view, position, "q", id_limit)
+            starts = durations = None
+            if version > 1:
+                starts, position = _read_array(view, position, "i", task_count)
+                durations, position = _read_array(view, position, "i", task_count)
+            dependencies = None
+            if version > 2:
+                (dependency_count,) = DEPENDENCY_HEADER.unpack_from(view, position)
+                position += DEPENDENCY_HEADER.size
+                predecessors, position = _read_array(
+                    view, position, "q", dependency_count
+                )
+                successors, position = _read_array(
+                    view, position, "q", dependency_count
+                )
+                dependencies = predecessors, successors
+            string_offsets, position = _read_array(
+                view, position, "q", string_count + 1
+            )
+            text = str(view[position:], "utf-8")
+        finally:
+            view.release()
+
+    strings = [
+        text[start:end] for start, end in zip(string_offsets, string_offsets[1:])
+    ]
+    store.load_columns(
+        ids,
+        parents,
+        names,
+        strings,
+        child_offsets,
+        child_rows,
+        rows_by_id,
+        starts,
+        durations,
+        dependencies,
+    )
+    return generation
+
+
+def _write_array(file: BinaryIO, column: array) -> None:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    file.write(column.tobytes())
+
+
+def _read_array(
+    view: memoryview, position: int, typecode: str, length: int
+) -> Tuple[array, int]:
+    column = array(typecode)
+    end = position + column.itemsize * length
+    column.frombytes(view[position:end])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column, end
@@ -1,23 +1,44 @@
-from dataclasses import dataclass, field
+from datetime import date
 from itertools import count
-from typing import List, Optional, Dict, Any
+from threading import RLock
+from typing import List, Optional, Dict, Any, Iterable
+
+from src.datamodel.task_store import (
+    DEFAULT_DURATION,
+    NO_DATE,
+    CyclicDependency,
+    TaskStore,
+)
 
 
 class TechnicalIdGen:
     counter = count()
+    # ids are also reserved by the thread of ProjectLoader while Tk creates tasks.
+    lock = RLock()
 
     @staticmethod
     def reset_to(num: int):
-        TechnicalIdGen.counter = count(num)
+        with TechnicalIdGen.lock:
+            TechnicalIdGen.counter = count(num)
 
     @staticmethod
     def set_minimum(num: int):
-        current = next(TechnicalIdGen.counter)
-        TechnicalIdGen.reset_to(max(current, num))
+        with TechnicalIdGen.lock:
+            current = next(TechnicalIdGen.counter)
+            TechnicalIdGen.reset_to(max(current, num))
 
     @staticmethod
     def next_num():
-        return next(TechnicalIdGen.counter)
+        with TechnicalIdGen.lock:
+            return next(TechnicalIdGen.counter)
+
+    @staticmethod
+    def reserve(count: int) -> range:
+        """Takes count ids at once, for tasks created in bulk."""
+        with TechnicalIdGen.lock:
+            first = next(TechnicalIdGen.counter)
+            TechnicalIdGen.reset_to(first + count)
+        return range(first, first + count)
 
 
 class OnlyOneParent(Exception):
@@ -28,35 +49,212 @@ class NoChildOfItself(Exception):
     pass
 
 
-@dataclass
 class Task:
-    name: str
-    children: List[int] = field(default_factory=list)
-    parent: Optional[int] = None
-    technical_id: int = field(default_factory=TechnicalIdGen.next_num)
+    """
+    Handle on a task.
+
+    A new task keeps its name and links by itself until it is attached to a TaskStore.
+    From then on the handle only remembers its technical id and every attribute is read
+    from and written to the store, so handles are cheap and can be created on demand.
+    """
+
+    __slots__ = (
+        "technical_id",
+        "store",
+        "_name",
+        "_children",
+        "_parent",
+        "_start",
+        "_duration",
+        "_predecessors",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        children: Optional[Iterable[int]] = None,
+        parent: Optional[int] = None,
+        technical_id: Optional[int] = None,
+        start: Optional[date] = None,
+        duration: int = DEFAULT_DURATION,
+        predecessors: Optional[Iterable[int]] = None,
+    ):
+        if technical_id is None:
+            technical_id = TechnicalIdGen.next_num()
+        self.technical_id = technical_id
+        self.store: Optional[TaskStore] = None
+        self._name = name
+        self._children = list(children or [])
+        self._parent = parent
+        self._start = start
+        self._duration = duration
+        self._predecessors = list(predecessors or [])
+
+    @classmethod
+    def from_store(cls, store: TaskStore, technical_id: int) -> "Task":
+        task = cls.__new__(cls)
+        task.technical_id = technical_id
+        task.store = store
+        task._name = task._children = task._parent = None
+        task._start = task._duration = task._predecessors = None
+        return task
+
+    def attach(self, store: TaskStore) -> None:
+        store.add(self.technical_id, self._name)
+        if self._start is not None or self._duration != DEFAULT_DURATION:
+            store.reschedule(
+                self.technical_id,
+                NO_DATE if self._start is None else self._start.toordinal(),
+                self._duration,
+            )
+        self.store = store
+        if self._parent is not None and self._parent in store:
+            store.link(self._parent, self.technical_id)
+        for child in self._children:
+            if child in store and store.parent(child) is None:
+                store.link(self.technical_id, child)
+        for predecessor in self._predecessors:
+            if predecessor in store:
+                store.add_dependency(predecessor, self.technical_id)
+        self._name = self._children = self._parent = None
+        self._start = self._duration = self._predecessors = None
+
+    @property
+    def name(self) -> str:
+        if self.store is None:
+            return self._name
+        return self.store.name(self.technical_id)
+
+    @name.setter
+    def name(self, name: str) -> None:
+        if self.store is None:
+            self._name = name
+        else:
+            self.store.rename(self.technical_id, name)
 
-    def __post_init__(self):
-        ID_TO_RESOURCE[self.technical_id] = self
+    @property
+    def start(self) -> Optional[date]:
+        if self.store is None:
+            return self._start
+        start = self.store.start(self.technical_id)
+        return None if start == NO_DATE else date.fromordinal(start)
+
+    @property
+    def duration(self) -> int:
+        """In days."""
+        if self.store is None:
+            return self._duration
+        return self.store.duration(self.technical_id)
+
+    def reschedule(self, start: Optional[date], duration: int) -> None:
+        if self.store is None:
+            self._start = start
+            self._duration = duration
+        else:
+            self.store.reschedule(
+                self.technical_id,
+                NO_DATE if start is None else start.toordinal(),
+                duration,
+            )
+
+    @property
+    def predecessors(self) -> List[int]:
+        """The tasks that have to be finished before this one starts."""
+        if self.store is None:
+            return self._predecessors
+        return self.store.predecessors(self.technical_id)
+
+    @property
+    def successors(self) -> List[int]:
+        if self.store is None:
+            return []
+        return self.store.successors(self.technical_id)
+
+    @property
+    def children(self) -> List[int]:
+        if self.store is None:
+            return self._children
+        return self.store.children(self.technical_id)
+
+    @property
+    def parent(self) -> Optional[int]:
+        if self.store is None:
+            return self._parent
+        return self.store.parent(self.technical_id)
 
     def serialize(self) -> Dict[str, Any]:
-        return vars(self)
+        return {
+            "name": self.name,
+            "children": self.children,
+            "parent": self.parent,
+            "technical_id": self.technical_id,
+            "start": None if self.start is None else self.start.isoformat(),
+            "duration": self.duration,
+            "predecessors": self.predecessors,
+        }
 
     @classmethod
     def deserialize(cls, dct: Dict[str, Any]) -> "Task":
         TechnicalIdGen.set_minimum(dct["technical_id"] + 1)
+        dct = dict(dct)
+        if dct.get("start") is not None:
+            dct["start"] = date.fromisoformat(dct["start"])
         return cls(**dct)
 
     def children_of(self, other_task: "Task") -> None:
         if self.parent is not None:
             raise OnlyOneParent("dummy")
-        if self is other_task:
+        if self == other_task:
             raise NoChildOfItself("baka")
-        self.parent = other_task.technical_id
-        other_task.children.append(self.technical_id)
+        if self.store is None:
+            self._parent = other_task.technical_id
+            other_task.children.append(self.technical_id)
+        else:
+            # the store walks up from other_task without building its hierarchy index,
+            # having no parent the task can only be refused for being above it.
+            try:
+                self.store.link(other_task.technical_id, self.technical_id)
+            except ValueError as error:
+                raise NoChildOfItself(str(error)) from error
 
     def remove_child(self, other_task: "Task") -> None:
-        self.children.remove(other_task.technical_id)
-        other_task.parent = None
+        if self.store is None:
+            self._children.remove(other_task.technical_id)
+            other_task._parent = None
+        else:
+            self.store.unlink(self.technical_id, other_task.technical_id)
+
+    def depends_on(self, other_task: "Task") -> None:
+        if self == other_task:
+            raise CyclicDependency(f"task {self.technical_id} cannot depend on itself")
+        if self.store is None:
+            self._predecessors.append(other_task.technical_id)
+        else:
+            self.store.add_dependency(other_task.technical_id, self.technical_id)
+
+    def can_depend_on(self, other_task: "Task") -> bool:
+        """Whether depends_on would accept other_task, cheap enough while dragging."""
+        if self == other_task:
+            return False
+        if self.store is None:
+            return other_task.technical_id not in self._predecessors
+        return self.store.can_depend(other_task.technical_id, self.technical_id)
+
+    def can_be_parent_of(self, other_task: "Task") -> bool:
+        """Whether parent_of would accept other_task, cheap enough while dragging."""
+        if self == other_task or other_task.parent is not None:
+            return False
+        if self.store is None:
+            return True
+        return not self.store.is_in_subtree(
+            self.technical_id, other_task.technical_id
+        )
+
+    def remove_dependency(self, other_task: "Task") -> None:
+        if self.store is None:
+            self._predecessors.remove(other_task.technical_id)
+        else:
+            self.store.remove_dependency(other_task.technical_id, self.technical_id)
 
     def parent_of(self, other_task: "Task") -> None:
         other_task.children_of(self)
@@ -64,5 +262,16 @@ class Task:
     def remove_parent(self, other_task: "Task"):
         other_task.remove_child(self)
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Task):
+            return NotImplemented
+        return self.technical_id == other.technical_id
+
+    def __hash__(self) -> int:
+        return hash(self.technical_id)
 
-ID_TO_RESOURCE: Dict[int, Task] = {}
+    def __repr__(self) -> str:
+        return (
+            f"Task(name={self.name!r}, children={self.children!r}, "
+            f"parent={self.parent!r}, technical_id={self.technical_id!r})"
+        )
@@ -0,0 +1,107 @@
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+# Monday first, as date.weekday.
+WORKING_WEEK = (True, True, True, True, True, False, False)
+
+
+class Resource(NamedTuple):
+    """
+    Someone or something tasks need. capacity is the units available on every working
+    day, days_off the day ordinals it does not work on besides its week ends and cost
+    the price of one unit for a day.
+    """
+
+    name: str
+    capacity: float = 1.0
+    working_days: Tuple[bool, ...] = WORKING_WEEK
+    days_off: FrozenSet[int] = frozenset()
+    cost: float = 0.0
+
+
+class ResourcePool:
+    """
+    The resources of a project, indexed by their order of addition, and the units of
+    them every task needs on each of its days.
+
+    Assignments are kept by technical id, the tasks themselves stay in the task store.
+    A task only uses its resources on the days they work.
+
+    Listeners are called with the technical id of every task whose assignments
+    changed, or with None when all of them may have.
+    """
+
+    def __init__(self):
+        self.resources: List[Resource] = []
+        # units of every resource assigned, by technical id of the task.
+        self.assignments: Dict[int, Dict[int, float]] = {}
+        self._listeners: List[Callable[[Optional[int]], None]] = []
+
+    def __len__(self) -> int:
+        return len(self.resources)
+
+    def clear(self) -> None:
+        listeners = self._listeners
+        self.__init__()
+        self._listeners = listeners
+        self._notify(None)
+
+    def subscribe(self, listener: Callable[[Optional[int]], None]) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Optional[int]], None]) -> None:
+        self._listeners.remove(listener)
+
+    def add(self, resource: Resource) -> int:
+        """Adds the resource, returns its index."""
+        self.resources.append(resource)
+        return len(self.resources) - 1
+
+    def replace(self, index: int, resource: Resource) -> None:
+        """Changes the resource, if it still suits the tasks it is assigned to."""
+        for units in self.assignments.values():
+            if index in units:
+                self._check_units(resource, units[index])
+        self.resources[index] = resource
+        for technical_id in self.tasks_of(index):
+            self._notify(technical_id)
+
+    def assign(self, technical_id: int, index: int, units: float = 1.0) -> None:
+        """Makes the task need units of the resource on every one of its days."""
+        self._check_units(self.resources[index], units)
+        self.assignments.setdefault(technical_id, {})[index] = units
+        self._notify(technical_id)
+
+    def unassign(self, technical_id: int, index: int) -> None:
+        units = self.assignments.get(technical_id, {})
+        if index not in units:
+            raise ValueError(
+                f"resource {index} is not assigned to task {technical_id}"
+            )
+        del units[index]
+        if not units:
+            del self.assignments[technical_id]
+        self._notify(technical_id)
+
+    def assignments_of(self, technical_id: int) -> Dict[int, float]:
+        return dict(self.assignments.get(technical_id, ()))
+
+    def tasks_of(self, index: int) -> List[int]:
+        return [
+            technical_id
+            for technical_id, units in self.assignments.items()
+            if index in units
+        ]
+
+    def _notify(self, technical_id: Optional[int]) -> None:
+        for listener in self._listeners:
+            listener(technical_id)
+
+    @staticmethod
+    def _check_units(resource: Resource, units: float) -> None:
+        if units <= 0:
+            raise ValueError(f"{units} units of {resource.name} cannot be assigned")
+        # such a task could never be placed by the leveling.
+        if units > resource.capacity or not any(resource.working_days):
+            raise ValueError(
+                f"{resource.name} never has {units} units available on a day"
+            )
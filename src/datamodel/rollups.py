@@ -0,0 +1,194 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from src.datamodel.resources import ResourcePool
+from src.datamodel.task_store import NO_ROW, TaskStore, TaskStoreListener
+
+
+class RollupChanges:
+    """
+    Technical ids of the tasks whose totals changed since the last call to clear.
+    reset is set when every total may have changed.
+    """
+
+    def __init__(self):
+        self.reset = False
+        self.changed: Dict[int, None] = {}
+
+    def __bool__(self) -> bool:
+        return self.reset or bool(self.changed)
+
+    def clear(self) -> None:
+        self.__init__()
+
+
+class SubtreeRollups(TaskStoreListener):
+    """
+    Effort, cost and number of tasks of the subtree of every task, itself included.
+
+    The effort of a task is its duration times the units of resources assigned to it,
+    its cost the same weighted by the cost of every resource. Totals are held by row
+    and built on first need, then every change only walks up from the task changed to
+    its root, the way the subtree sizes of HierarchyIndex are kept. Reading a total
+    takes constant time, counts come from the task store itself.
+
+    As with HierarchyIndex, once the walks since the build visited more rows than
+    there are, the totals are dropped and built again on the next read.
+    """
+
+    def __init__(self, store: TaskStore, pool: ResourcePool):
+        self.store = store
+        self.pool = pool
+        # own and total effort and cost of every row, None until first needed.
+        self._own_efforts: Optional[array] = None
+        self._own_costs = array("d")
+        self._efforts = array("d")
+        self._costs = array("d")
+        # rows visited by the walks since the build.
+        self._work = 0
+        self._trackers: List[RollupChanges] = []
+        store.subscribe(self)
+        pool.subscribe(self.assignments_changed)
+
+    def track(self) -> RollupChanges:
+        """Returns a RollupChanges that will be filled by every following change."""
+        changes = RollupChanges()
+        self._trackers.append(changes)
+        return changes
+
+    def effort(self, technical_id: int) -> float:
+        self._build()
+        return self._efforts[self._row(technical_id)]
+
+    def cost(self, technical_id: int) -> float:
+        self._build()
+        return self._costs[self._row(technical_id)]
+
+    def count(self, technical_id: int) -> int:
+        return self.store.subtree_size(technical_id)
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        if self._own_efforts is None:
+            return
+        effort, cost = self._own(technical_id)
+        self._own_efforts.append(effort)
+        self._own_costs.append(cost)
+        self._efforts.append(effort)
+        self._costs.append(cost)
+        for changes in self._trackers:
+            changes.changed[technical_id] = None
+
+    def task_linked(self, parent_id: int, child_id: int) -> None:
+        if self._own_efforts is not None:
+            child_row = self._row(child_id)
+            self._add(
+                self._row(parent_id), self._efforts[child_row], self._costs[child_row]
+            )
+
+    def task_unlinked(self, parent_id: int, child_id: int) -> None:
+        if self._own_efforts is not None:
+            child_row = self._row(child_id)
+            self._add(
+                self._row(parent_id),
+                -self._efforts[child_row],
+                -self._costs[child_row],
+            )
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        self._update_own(technical_id)
+
+    def store_cleared(self) -> None:
+        self._drop()
+
+    def assignments_changed(self, technical_id: Optional[int]) -> None:
+        """Called by the resource pool, with None when every task may be concerned."""
+        if technical_id is None:
+            self._drop()
+        elif technical_id in self.store:
+            self._update_own(technical_id)
+
+    def _own(self, technical_id: int) -> Tuple[float, float]:
+        units = self.pool.assignments.get(technical_id)
+        if not units:
+            return 0.0, 0.0
+        duration = self.store.duration(technical_id)
+        resources = self.pool.resources
+        return (
+            duration * sum(units.values()),
+            duration
+            * sum(needed * resources[index].cost for index, needed in units.items()),
+        )
+
+    def _update_own(self, technical_id: int) -> None:
+        if self._own_efforts is None:
+            return
+        row = self._row(technical_id)
+        effort, cost = self._own(technical_id)
+        effort_change = effort - self._own_efforts[row]
+        cost_change = cost - self._own_costs[row]
+        if effort_change or cost_change:
+            self._own_efforts[row] = effort
+            self._own_costs[row] = cost
+            self._add(row, effort_change, cost_change)
+
+    def _add(self, row: int, effort: float, cost: float) -> None:
+        """Adds to the totals of row and of every row above it."""
+        ids, parents = self.store.columns()[:2]
+        efforts = self._efforts
+        costs = self._costs
+        trackers = self._trackers
+        while row != NO_ROW:
+            self._work += 1
+            if self._work > len(efforts):
+                self._drop()
+                return
+            efforts[row] += effort
+            costs[row] += cost
+            for changes in trackers:
+                changes.changed[ids[row]] = None
+            row = parents[row]
+
+    def _drop(self) -> None:
+        self._own_efforts = None
+        self._work = 0
+        for changes in self._trackers:
+            changes.clear()
+            changes.reset = True
+
+    def _build(self) -> None:
+        if self._own_efforts is not None:
+            return
+
+        store = self.store
+        ids, parents = store.columns()[:2]
+        row_count = len(ids)
+        rows_by_id = store.rows_by_id()
+        self._own_efforts = array("d", [0.0]) * row_count
+        self._own_costs = array("d", [0.0]) * row_count
+        for technical_id in self.pool.assignments:
+            if technical_id in store:
+                row = rows_by_id[technical_id]
+                self._own_efforts[row], self._own_costs[row] = self._own(technical_id)
+        self._efforts = self._own_efforts[:]
+        self._costs = self._own_costs[:]
+
+        # every row after its parent, the totals are then summed up from the end.
+        child_offsets, child_rows = store.child_index()
+        order = array("q", (row for row in range(row_count) if parents[row] == NO_ROW))
+        position = 0
+        while position < len(order):
+            row = order[position]
+            order.extend(child_rows[child_offsets[row] : child_offsets[row + 1]])
+            position += 1
+        efforts = self._efforts
+        costs = self._costs
+        for row in reversed(order):
+            parent_row = parents[row]
+            if parent_row != NO_ROW:
+                efforts[parent_row] += efforts[row]
+                costs[parent_row] += costs[row]
+
+    def _row(self, technical_id: int) -> int:
+        if technical_id not in self.store:
+            raise KeyError(technical_id)
+        return self.store.rows_by_id()[technical_id]
@@ -0,0 +1,307 @@
+from array import array
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from src.datamodel.task_store import (
+    NO_DATE,
+    CyclicDependency,
+    TaskStore,
+    TaskStoreListener,
+)
+
+
+class ScheduleDates(NamedTuple):
+    """Day ordinals of a task, finishes are the day after its last one."""
+
+    early_start: int
+    early_finish: int
+    late_start: int
+    late_finish: int
+    slack: int
+
+
+class CriticalPathScheduler(TaskStoreListener):
+    """
+    Computes the early and late starts and finishes of the tasks of a store, and
+    their slack, by the critical path method over the finish to start dependencies.
+
+    Tasks are indexed by row and grouped by level, the length of the longest chain of
+    predecessors leading to them. The forward pass handles one level at a time, with
+    vectorized operations over every dependency ending in it, and the backward pass
+    does the same from the last level down. Rescheduled tasks only have the early dates
+    of their downstream cone recomputed, and the late dates upstream of that cone,
+    unless the end of the project moved. New tasks and dependencies lay the levels out
+    again.
+
+    A scheduled task starts no earlier than its own start, the others no earlier than
+    the start of the project, which is the earliest start of all.
+    """
+
+    def __init__(self, store: TaskStore):
+        self.store = store
+        self.is_stale = True
+        self.rescheduled: Dict[int, None] = {}
+        self.project_start = date.today().toordinal()
+        self.project_finish = self.project_start
+
+        empty = np.zeros(0, dtype=np.int64)
+        self._rows_by_id = empty
+        self._starts = self._durations = empty
+        self._sources = self._targets = empty
+        # outgoing and incoming dependencies of every row, in compressed sparse row
+        # layout over the dependency indexes.
+        self._out_offsets = self._out_edges = empty
+        self._in_offsets = self._in_edges = empty
+        # rows and dependencies sorted by level, with the bounds of every level.
+        self._levels = empty
+        self._row_order = self._row_bounds = empty
+        self._forward_order = self._forward_bounds = empty
+        self._backward_order = self._backward_bounds = empty
+
+        self.early_starts = self.early_finishes = empty
+        self.late_starts = self.late_finishes = empty
+        store.subscribe(self)
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        self.is_stale = True
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        self.rescheduled[technical_id] = None
+
+    def dependency_added(self, predecessor_id: int, successor_id: int) -> None:
+        self.is_stale = True
+
+    def dependency_removed(self, predecessor_id: int, successor_id: int) -> None:
+        self.is_stale = True
+
+    def store_cleared(self) -> None:
+        self.is_stale = True
+
+    def dates(self, technical_id: int) -> ScheduleDates:
+        self.schedule()
+        row = self._rows_by_id[technical_id]
+        return ScheduleDates(
+            int(self.early_starts[row]),
+            int(self.early_finishes[row]),
+            int(self.late_starts[row]),
+            int(self.late_finishes[row]),
+            int(self.late_starts[row] - self.early_starts[row]),
+        )
+
+    def critical_tasks(self) -> List[int]:
+        """Technical ids of the tasks without slack, by early start."""
+        self.schedule()
+        rows = np.flatnonzero(self.late_starts == self.early_starts)
+        rows = rows[np.argsort(self.early_starts[rows], kind="stable")]
+        return _to_numpy(self.store.columns()[0])[rows].tolist()
+
+    def schedule(self) -> None:
+        """Brings the dates up to date with the store, doing as little as it can."""
+        if self.is_stale:
+            self._build()
+            self._forward()
+            self._backward()
+            self.is_stale = False
+            self.rescheduled.clear()
+            return
+        if not self.rescheduled:
+            return
+
+        rows = self._rows_by_id[list(self.rescheduled)]
+        self.rescheduled.clear()
+        self._read_schedule(rows)
+        if self._update_project_start():
+            self._forward()
+            self._backward()
+            return
+
+        cone = self._closure(rows, self._out_offsets, self._out_edges, self._targets)
+        project_finish = self.project_finish
+        self._forward(cone)
+        if self.project_finish != project_finish:
+            self._backward()
+        else:
+            self._backward(
+                self._closure(
+                    np.flatnonzero(cone),
+                    self._in_offsets,
+                    self._in_edges,
+                    self._sources,
+                )
+            )
+
+    def _build(self) -> None:
+        self._rows_by_id = _to_numpy(self.store.rows_by_id())
+        row_count = len(self.store)
+        starts, durations = self.store.schedule_columns()
+        self._starts = _to_numpy(starts)
+        self._durations = _to_numpy(durations)
+        self._update_project_start()
+
+        predecessors, successors = self.store.dependency_columns()
+        self._sources = self._rows_by_id[_to_numpy(predecessors)]
+        self._targets = self._rows_by_id[_to_numpy(successors)]
+        self._out_offsets, self._out_edges = _index(self._sources, row_count)
+        self._in_offsets, self._in_edges = _index(self._targets, row_count)
+
+        # Kahn's algorithm, one level at a time.
+        levels = np.zeros(row_count, dtype=np.int64)
+        in_degrees = np.bincount(self._targets, minlength=row_count)
+        frontier = np.flatnonzero(in_degrees == 0)
+        level = 0
+        placed = 0
+        while frontier.size:
+            levels[frontier] = level
+            placed += frontier.size
+            edges = self._out_edges[_ranges(self._out_offsets, frontier)]
+            targets = self._targets[edges]
+            in_degrees -= np.bincount(targets, minlength=row_count)
+            frontier = np.unique(targets[in_degrees[targets] == 0])
+            level += 1
+        if placed < row_count:
+            raise CyclicDependency("the dependencies of the tasks make a cycle")
+
+        self._levels = levels
+        self._row_order, self._row_bounds = _by_level(levels, level)
+        self._forward_order, self._forward_bounds = _by_level(
+            levels[self._targets], level
+        )
+        self._backward_order, self._backward_bounds = _by_level(
+            levels[self._sources], level
+        )
+        self.early_starts = np.zeros(row_count, dtype=np.int64)
+        self.early_finishes = np.zeros(row_count, dtype=np.int64)
+        self.late_starts = np.zeros(row_count, dtype=np.int64)
+        self.late_finishes = np.zeros(row_count, dtype=np.int64)
+
+    def _read_schedule(self, rows: np.ndarray) -> None:
+        starts, durations = self.store.schedule_columns()
+        for row in rows.tolist():
+            self._starts[row] = starts[row]
+            self._durations[row] = durations[row]
+
+    def _update_project_start(self) -> bool:
+        """Returns whether the start of the project moved."""
+        scheduled = self._starts[self._starts != NO_DATE]
+        if scheduled.size:
+            project_start = int(scheduled.min())
+        else:
+            project_start = date.today().toordinal()
+        is_moved = project_start != self.project_start
+        self.project_start = project_start
+        return is_moved
+
+    def _forward(self, rows: Optional[np.ndarray] = None) -> None:
+        """Computes the early dates of the rows set in the mask, or of every row."""
+        first_level = 0
+        early_starts = self.early_starts
+        early_finishes = self.early_finishes
+        constraints = np.where(
+            self._starts == NO_DATE, self.project_start, self._starts
+        )
+        if rows is None:
+            early_starts[:] = constraints
+        else:
+            early_starts[rows] = constraints[rows]
+            # the levels before the first row of the mask are left as they are.
+            if rows.any():
+                first_level = int(self._levels[rows].min())
+
+        for level in range(first_level, len(self._row_bounds) - 1):
+            edges = self._forward_order[
+                self._forward_bounds[level] : self._forward_bounds[level + 1]
+            ]
+            level_rows = self._row_order[
+                self._row_bounds[level] : self._row_bounds[level + 1]
+            ]
+            if rows is not None:
+                edges = edges[rows[self._targets[edges]]]
+                level_rows = level_rows[rows[level_rows]]
+            np.maximum.at(
+                early_starts,
+                self._targets[edges],
+                early_finishes[self._sources[edges]],
+            )
+            early_finishes[level_rows] = (
+                early_starts[level_rows] + self._durations[level_rows]
+            )
+
+        if early_finishes.size:
+            self.project_finish = int(early_finishes.max())
+        else:
+            self.project_finish = self.project_start
+
+    def _backward(self, rows: Optional[np.ndarray] = None) -> None:
+        """Computes the late dates of the rows set in the mask, or of every row."""
+        late_starts = self.late_starts
+        late_finishes = self.late_finishes
+        if rows is None:
+            late_finishes[:] = self.project_finish
+        else:
+            late_finishes[rows] = self.project_finish
+
+        for level in reversed(range(len(self._row_bounds) - 1)):
+            edges = self._backward_order[
+                self._backward_bounds[level] : self._backward_bounds[level + 1]
+            ]
+            level_rows = self._row_order[
+                self._row_bounds[level] : self._row_bounds[level + 1]
+            ]
+            if rows is not None:
+                edges = edges[rows[self._sources[edges]]]
+                level_rows = level_rows[rows[level_rows]]
+            np.minimum.at(
+                late_finishes,
+                self._sources[edges],
+                late_starts[self._targets[edges]],
+            )
+            late_starts[level_rows] = (
+                late_finishes[level_rows] - self._durations[level_rows]
+            )
+
+    def _closure(
+        self,
+        rows: np.ndarray,
+        offsets: np.ndarray,
+        edges: np.ndarray,
+        ends: np.ndarray,
+    ) -> np.ndarray:
+        """Mask of the rows reachable from rows through the edges, rows included."""
+        reached = np.zeros(len(self._starts), dtype=bool)
+        reached[rows] = True
+        frontier = np.unique(rows)
+        while frontier.size:
+            following = ends[edges[_ranges(offsets, frontier)]]
+            frontier = np.unique(following[~reached[following]])
+            reached[frontier] = True
+        return reached
+
+
+def _to_numpy(column: array) -> np.ndarray:
+    # copied, numpy would otherwise keep the array from growing.
+    return np.frombuffer(column, dtype=column.typecode).astype(np.int64)
+
+
+def _index(rows: np.ndarray, row_count: int):
+    """The edges of every row, in compressed sparse row layout."""
+    edges = np.argsort(rows, kind="stable")
+    offsets = np.searchsorted(rows[edges], np.arange(row_count + 1))
+    return offsets, edges
+
+
+def _ranges(offsets: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Concatenation of the ranges offsets[row]:offsets[row + 1] of every row."""
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    ends = np.cumsum(counts)
+    total = ends[-1] if ends.size else 0
+    return np.repeat(starts - ends + counts, counts) + np.arange(total)
+
+
+def _by_level(levels: np.ndarray, level_count: int):
+    """Indexes sorted by level, and where every level starts among them."""
+    order = np.argsort(levels, kind="stable")
+    bounds = np.searchsorted(levels[order], np.arange(level_count + 1))
+    return order, bounds
@@ -0,0 +1,845 @@
+from array import array
+from collections import deque
+from itertools import compress, repeat
+from operator import add, sub
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+NO_ROW = -1
+# start of the tasks not scheduled yet, starts are otherwise date ordinals.
+NO_DATE = 0
+# in days.
+DEFAULT_DURATION = 1
+# distance between two consecutive labels of a HierarchyIndex laid out from scratch.
+LABEL_SPACING = 1 << 24
+# spacings left free before the exit label of a task, besides two per child, for the
+# children linked to it later.
+LABEL_ROOM = 16
+
+
+class TaskStoreListener:
+    """Notified of every change made to a TaskStore it is subscribed to, in order."""
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        pass
+
+    def task_renamed(self, technical_id: int, name: str) -> None:
+        pass
+
+    def task_linked(self, parent_id: int, child_id: int) -> None:
+        pass
+
+    def task_unlinked(self, parent_id: int, child_id: int) -> None:
+        pass
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        pass
+
+    def dependency_added(self, predecessor_id: int, successor_id: int) -> None:
+        pass
+
+    def dependency_removed(self, predecessor_id: int, successor_id: int) -> None:
+        pass
+
+    def store_cleared(self) -> None:
+        """The store was emptied, and possibly refilled at once by load_columns."""
+        pass
+
+
+class CyclicDependency(ValueError):
+    pass
+
+
+class TaskChanges(TaskStoreListener):
+    """
+    Technical ids of the tasks changed in a TaskStore since the last call to clear.
+    reset is set when the whole store has been cleared, in which case the other sets
+    only hold what happened afterwards.
+    """
+
+    def __init__(self):
+        self.reset = False
+        self.created: Dict[int, None] = {}
+        self.renamed: Dict[int, None] = {}
+        self.relinked: Dict[int, None] = {}
+        self.rescheduled: Dict[int, None] = {}
+        # both ends of the dependencies added or removed.
+        self.redepended: Dict[int, None] = {}
+
+    def __bool__(self) -> bool:
+        return self.reset or bool(
+            self.created
+            or self.renamed
+            or self.relinked
+            or self.rescheduled
+            or self.redepended
+        )
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        self.created[technical_id] = None
+
+    def task_renamed(self, technical_id: int, name: str) -> None:
+        self.renamed[technical_id] = None
+
+    def task_linked(self, parent_id: int, child_id: int) -> None:
+        self.relinked[child_id] = None
+
+    def task_unlinked(self, parent_id: int, child_id: int) -> None:
+        self.relinked[child_id] = None
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        self.rescheduled[technical_id] = None
+
+    def dependency_added(self, predecessor_id: int, successor_id: int) -> None:
+        self.redepended[predecessor_id] = None
+        self.redepended[successor_id] = None
+
+    def dependency_removed(self, predecessor_id: int, successor_id: int) -> None:
+        self.redepended[predecessor_id] = None
+        self.redepended[successor_id] = None
+
+    def store_cleared(self) -> None:
+        self.clear()
+        self.reset = True
+
+
+class HierarchyIndex:
+    """
+    Interval labeling of the hierarchy of a TaskStore, by row: every task has an enter
+    and an exit label, between which those of all its descendants nest, so that telling
+    whether a task is above another is a comparison. Depths and subtree sizes are kept
+    along.
+
+    Labels are spread LABEL_SPACING apart, with room left before every exit label. A
+    reparented subtree is labeled again inside the room left at the end of its new
+    parent, or after every other label when it becomes a root, so that it costs the
+    size of the subtree plus its depth.
+
+    Once the room is too small, or once following changes would cost more than
+    labeling everything again, linked and unlinked give up and the store drops the
+    index, to be built again on the next query. Bulk linking, as loading does, then
+    costs one build per query at most instead of one per change.
+    """
+
+    def __init__(self, store: "TaskStore"):
+        self.store = store
+        self.rebuild()
+
+    def is_ancestor(self, ancestor_row: int, row: int) -> bool:
+        return (
+            self.enters[ancestor_row] < self.enters[row]
+            and self.exits[row] < self.exits[ancestor_row]
+        )
+
+    def rebuild(self) -> None:
+        store = self.store
+        row_count = len(store)
+        self.enters = array("q", [0]) * row_count
+        self.exits = array("q", [0]) * row_count
+        self.depths = array("i", [0]) * row_count
+        self.sizes = array("q", [1]) * row_count
+        self.end = 0
+        # rows visited by the changes followed since the build.
+        self.work = 0
+
+        child_offsets, child_rows = store.child_index()
+        for root, parent_row in enumerate(store._parents):
+            if parent_row != NO_ROW:
+                continue
+            self.end += LABEL_SPACING
+            self.enters[root] = self.end
+            stack = [root]
+            positions = [child_offsets[root]]
+            while stack:
+                row = stack[-1]
+                position = positions[-1]
+                if position < child_offsets[row + 1]:
+                    positions[-1] = position + 1
+                    child = child_rows[position]
+                    self.end += LABEL_SPACING
+                    self.enters[child] = self.end
+                    self.depths[child] = self.depths[row] + 1
+                    stack.append(child)
+                    positions.append(child_offsets[child])
+                else:
+                    stack.pop()
+                    positions.pop()
+                    child_count = child_offsets[row + 1] - child_offsets[row]
+                    self.end += LABEL_SPACING * (2 * child_count + LABEL_ROOM)
+                    self.exits[row] = self.end
+                    if stack:
+                        self.sizes[stack[-1]] += self.sizes[row]
+
+    def added(self, row: int) -> None:
+        self.enters.append(self.end + LABEL_SPACING)
+        self.end += LABEL_SPACING * (1 + LABEL_ROOM)
+        self.exits.append(self.end)
+        self.depths.append(0)
+        self.sizes.append(1)
+
+    def linked(self, parent_row: int, child_row: int) -> bool:
+        """
+        Follows child_row, a former root, now the last child of parent_row. Returns
+        False, leaving the index stale, when it is cheaper to build it again.
+        """
+        previous_row = self.store._previous_siblings[child_row]
+        if previous_row == NO_ROW:
+            lower = self.enters[parent_row]
+        else:
+            lower = self.exits[previous_row]
+        size = self.sizes[child_row]
+        # the labels and room of the subtree, with a spacing to spare before the exit.
+        spacings = size * (1 + LABEL_ROOM) + 2 * (size - 1) + 1
+        # at most half the room left is taken, for the next children to fit as well.
+        step = min(LABEL_SPACING, (self.exits[parent_row] - lower) // (2 * spacings))
+        if step == 0 or not self._spend(self.depths[parent_row] + 1 + size):
+            return False
+        self._add_size(parent_row, size)
+        self._label(child_row, lower, step, self.depths[parent_row] + 1)
+        return True
+
+    def unlinked(self, parent_row: int, child_row: int) -> bool:
+        """Follows child_row, a root from now on, see linked."""
+        if not self._spend(self.depths[parent_row] + 1 + self.sizes[child_row]):
+            return False
+        self._add_size(parent_row, -self.sizes[child_row])
+        self.end = self._label(child_row, self.end, LABEL_SPACING, 0)
+        return True
+
+    def _spend(self, rows: int) -> bool:
+        """Whether visiting rows more keeps the changes cheaper than a build."""
+        self.work += rows
+        return self.work <= len(self.enters)
+
+    def _add_size(self, row: int, size: int) -> None:
+        parents = self.store._parents
+        while row != NO_ROW:
+            self.sizes[row] += size
+            row = parents[row]
+
+    def _label(self, root: int, label: int, step: int, depth: int) -> int:
+        """Labels the subtree of root after label, step apart. Returns the last one."""
+        first_children = self.store._first_children
+        next_siblings = self.store._next_siblings
+        child_counts = self.store._child_counts
+        label += step
+        self.enters[root] = label
+        self.depths[root] = depth
+        stack = [root]
+        row = first_children[root]
+        while stack:
+            if row != NO_ROW:
+                label += step
+                self.enters[row] = label
+                self.depths[row] = self.depths[stack[-1]] + 1
+                stack.append(row)
+                row = first_children[row]
+            else:
+                done_row = stack.pop()
+                label += step * (2 * child_counts[done_row] + LABEL_ROOM)
+                self.exits[done_row] = label
+                row = next_siblings[done_row] if stack else NO_ROW
+        return label
+
+
+class TaskStore:
+    """
+    Column oriented storage of the task hierarchy.
+
+    Every task is a row. The rows are held in flat arrays (technical id, parent row,
+    name index into a string table, start and duration in days) and the children of
+    a task are kept as an intrusive doubly linked list (first child, last child,
+    previous and next sibling rows), which keeps them ordered while allowing constant
+    time removal.
+
+    Technical ids come from TechnicalIdGen and are therefore dense, so the id to row
+    index is a flat array as well.
+
+    A store filled by load_columns reads the children from the compressed sparse row
+    index it was given, and only builds the linked lists once the hierarchy changes.
+
+    The dependencies between tasks are kept in a topological order maintained with the
+    Pearce-Kelly algorithm: a new dependency only looks at the tasks ordered between
+    its two ends to find cycles and to restore the order.
+
+    Ancestry, depths and subtree sizes are answered in constant time from a
+    HierarchyIndex, built the first time one of them is asked and then kept up to date.
+    """
+
+    def __init__(self):
+        self._ids = array("q")
+        self._parents = array("q")
+        self._names = array("i")
+        self._starts = array("i")
+        self._durations = array("i")
+        self._first_children = array("q")
+        self._last_children = array("q")
+        self._previous_siblings = array("q")
+        self._next_siblings = array("q")
+        self._child_counts = array("i")
+        # children index as given to load_columns, in use instead of the linked lists
+        # above until the hierarchy is first changed, see _thaw.
+        self._child_offsets: Optional[array] = None
+        self._child_rows: Optional[array] = None
+
+        self._strings: List[str] = []
+        # built on first need, see _intern.
+        self._string_indexes: Optional[Dict[str, int]] = {}
+        self._rows_by_id = array("q")
+        # finish to start dependencies, both ways, by technical id.
+        self._successors: Dict[int, List[int]] = {}
+        self._predecessors: Dict[int, List[int]] = {}
+        # position of every row in a topological order of the dependencies, built on
+        # first need and then kept up to date, see add_dependency.
+        self._orders: Optional[array] = None
+        # built on first need, see _hierarchy_index.
+        self._hierarchy: Optional[HierarchyIndex] = None
+        self._listeners: List[TaskStoreListener] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, technical_id: int) -> bool:
+        return self._find_row(technical_id) != NO_ROW
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def clear(self) -> None:
+        listeners = self._listeners
+        self.__init__()
+        self._listeners = listeners
+        for listener in listeners:
+            listener.store_cleared()
+
+    def columns(self) -> Tuple[array, array, array, List[str]]:
+        """
+        Returns the technical ids, the parent rows and the name indexes of every row,
+        and the string table the name indexes point into.
+        """
+        return self._ids, self._parents, self._names, self._strings
+
+    def schedule_columns(self) -> Tuple[array, array]:
+        """Returns the start and the duration of every row, see start and duration."""
+        return self._starts, self._durations
+
+    def dependency_columns(self) -> Tuple[array, array]:
+        """Returns the ids at both ends of every dependency, predecessors first."""
+        predecessors = array("q")
+        successors = array("q")
+        for predecessor_id, successor_ids in self._successors.items():
+            predecessors.extend(repeat(predecessor_id, len(successor_ids)))
+            successors.extend(successor_ids)
+        return predecessors, successors
+
+    def child_index(self) -> Tuple[array, array]:
+        """
+        Returns the children of every row in compressed sparse row layout: the children
+        rows of row r are child_rows[child_offsets[r]:child_offsets[r + 1]], in order.
+        """
+        if self._child_offsets is not None:
+            return self._child_offsets, self._child_rows
+
+        child_offsets = array("q", [0])
+        child_rows = array("q")
+        for first_row in self._first_children:
+            row = first_row
+            while row != NO_ROW:
+                child_rows.append(row)
+                row = self._next_siblings[row]
+            child_offsets.append(len(child_rows))
+        return child_offsets, child_rows
+
+    def load_columns(
+        self,
+        ids: array,
+        parents: array,
+        names: array,
+        strings: Sequence[str],
+        child_offsets: array,
+        child_rows: array,
+        rows_by_id: array,
+        starts: Optional[array] = None,
+        durations: Optional[array] = None,
+        dependencies: Optional[Tuple[array, array]] = None,
+    ) -> None:
+        """
+        Replaces the content of the store, see columns, child_index, id_limit,
+        schedule_columns and dependency_columns. Tasks are left unscheduled when starts
+        and durations are not given.
+
+        The children index is kept as given until the hierarchy is first changed, so
+        that loading does not cost more than copying the columns.
+        """
+        self.clear()
+        self._ids = ids
+        self._parents = parents
+        self._names = names
+        self._strings = list(strings)
+        self._string_indexes = None
+        self._rows_by_id = rows_by_id
+        self._child_offsets = child_offsets
+        self._child_rows = child_rows
+        if starts is None:
+            starts = array("i", [NO_DATE]) * len(ids)
+        if durations is None:
+            durations = array("i", [DEFAULT_DURATION]) * len(ids)
+        self._starts = starts
+        self._durations = durations
+        for predecessor_id, successor_id in zip(*dependencies or ((), ())):
+            self._successors.setdefault(predecessor_id, []).append(successor_id)
+            self._predecessors.setdefault(successor_id, []).append(predecessor_id)
+
+    def copy(self) -> "TaskStore":
+        """
+        Returns a store holding the same tasks, without the listeners. Only flat columns
+        are copied, which is cheap enough to be done on the main thread before handing
+        the copy over to another one.
+        """
+        copy = TaskStore()
+        for column in (
+            "_ids",
+            "_parents",
+            "_names",
+            "_starts",
+            "_durations",
+            "_first_children",
+            "_last_children",
+            "_previous_siblings",
+            "_next_siblings",
+            "_child_counts",
+            "_rows_by_id",
+        ):
+            setattr(copy, column, getattr(self, column)[:])
+        if self._child_offsets is not None:
+            copy._child_offsets = self._child_offsets[:]
+            copy._child_rows = self._child_rows[:]
+        copy._strings = self._strings[:]
+        copy._string_indexes = None
+        if self._orders is not None:
+            copy._orders = self._orders[:]
+        copy._successors = {
+            technical_id: successors[:]
+            for technical_id, successors in self._successors.items()
+        }
+        copy._predecessors = {
+            technical_id: predecessors[:]
+            for technical_id, predecessors in self._predecessors.items()
+        }
+        return copy
+
+    def id_limit(self) -> int:
+        """One more than the highest technical id stored."""
+        return len(self._rows_by_id)
+
+    def rows_by_id(self) -> array:
+        """The row of every technical id below id_limit, NO_ROW for unknown ones."""
+        return self._rows_by_id
+
+    def subscribe(self, listener: TaskStoreListener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: TaskStoreListener) -> None:
+        self._listeners.remove(listener)
+
+    def track(self) -> TaskChanges:
+        """Returns a TaskChanges that will be filled by every following mutation."""
+        changes = TaskChanges()
+        self.subscribe(changes)
+        return changes
+
+    def add(self, technical_id: int, name: str) -> int:
+        if technical_id in self:
+            raise KeyError(f"task {technical_id} is already stored")
+
+        row = len(self._ids)
+        self._ids.append(technical_id)
+        self._parents.append(NO_ROW)
+        self._names.append(self._intern(name))
+        if self._orders is not None:
+            # a task without dependencies fits anywhere, the end is free.
+            self._orders.append(row)
+        if self._hierarchy is not None:
+            self._hierarchy.added(row)
+        self._starts.append(NO_DATE)
+        self._durations.append(DEFAULT_DURATION)
+        if self._child_offsets is not None:
+            self._child_offsets.append(self._child_offsets[-1])
+        else:
+            self._first_children.append(NO_ROW)
+            self._last_children.append(NO_ROW)
+            self._previous_siblings.append(NO_ROW)
+            self._next_siblings.append(NO_ROW)
+            self._child_counts.append(0)
+
+        missing = technical_id + 1 - len(self._rows_by_id)
+        if missing > 0:
+            self._rows_by_id.extend([NO_ROW] * missing)
+        self._rows_by_id[technical_id] = row
+        for listener in self._listeners:
+            listener.task_added(technical_id, name)
+        return row
+
+    def name(self, technical_id: int) -> str:
+        return self._strings[self._names[self._row(technical_id)]]
+
+    def rename(self, technical_id: int, name: str) -> None:
+        self._names[self._row(technical_id)] = self._intern(name)
+        for listener in self._listeners:
+            listener.task_renamed(technical_id, name)
+
+    def start(self, technical_id: int) -> int:
+        """Ordinal of the first day of the task, NO_DATE if it is not scheduled."""
+        return self._starts[self._row(technical_id)]
+
+    def duration(self, technical_id: int) -> int:
+        return self._durations[self._row(technical_id)]
+
+    def reschedule(self, technical_id: int, start: int, duration: int) -> None:
+        row = self._row(technical_id)
+        self._starts[row] = start
+        self._durations[row] = duration
+        for listener in self._listeners:
+            listener.task_rescheduled(technical_id, start, duration)
+
+    def parent(self, technical_id: int) -> Optional[int]:
+        return self._id_of(self._parents[self._row(technical_id)])
+
+    def children(self, technical_id: int) -> List[int]:
+        return list(self.iter_children(technical_id))
+
+    def iter_children(self, technical_id: int) -> Iterator[int]:
+        if self._child_offsets is not None:
+            row = self._row(technical_id)
+            start = self._child_offsets[row]
+            end = self._child_offsets[row + 1]
+            yield from map(self._ids.__getitem__, self._child_rows[start:end])
+            return
+
+        row = self._first_children[self._row(technical_id)]
+        while row != NO_ROW:
+            yield self._ids[row]
+            row = self._next_siblings[row]
+
+    def child_count(self, technical_id: int) -> int:
+        row = self._row(technical_id)
+        if self._child_offsets is not None:
+            return self._child_offsets[row + 1] - self._child_offsets[row]
+        return self._child_counts[row]
+
+    def first_child(self, technical_id: int) -> Optional[int]:
+        row = self._row(technical_id)
+        if self._child_offsets is not None:
+            if self._child_offsets[row] == self._child_offsets[row + 1]:
+                return None
+            return self._ids[self._child_rows[self._child_offsets[row]]]
+        return self._id_of(self._first_children[row])
+
+    def last_child(self, technical_id: int) -> Optional[int]:
+        row = self._row(technical_id)
+        if self._child_offsets is not None:
+            if self._child_offsets[row] == self._child_offsets[row + 1]:
+                return None
+            return self._ids[self._child_rows[self._child_offsets[row + 1] - 1]]
+        return self._id_of(self._last_children[row])
+
+    def previous_sibling(self, technical_id: int) -> Optional[int]:
+        self._thaw()
+        return self._id_of(self._previous_siblings[self._row(technical_id)])
+
+    def next_sibling(self, technical_id: int) -> Optional[int]:
+        self._thaw()
+        return self._id_of(self._next_siblings[self._row(technical_id)])
+
+    def roots(self) -> List[int]:
+        return [
+            technical_id
+            for technical_id, parent_row in zip(self._ids, self._parents)
+            if parent_row == NO_ROW
+        ]
+
+    def link(self, parent_id: int, child_id: int) -> None:
+        """Append child_id at the end of the children of parent_id."""
+        self._thaw()
+        parent_row = self._row(parent_id)
+        child_row = self._row(child_id)
+        if self._parents[child_row] != NO_ROW:
+            raise ValueError(f"task {child_id} already has a parent")
+        # a task without children cannot be above another, which spares the search
+        # when tasks are linked from the top down.
+        if child_row == parent_row or (
+            self._child_counts[child_row] and self._is_above(child_row, parent_row)
+        ):
+            raise ValueError(f"task {child_id} is above task {parent_id}")
+
+        last_row = self._last_children[parent_row]
+        self._parents[child_row] = parent_row
+        self._previous_siblings[child_row] = last_row
+        self._next_siblings[child_row] = NO_ROW
+        if last_row == NO_ROW:
+            self._first_children[parent_row] = child_row
+        else:
+            self._next_siblings[last_row] = child_row
+        self._last_children[parent_row] = child_row
+        self._child_counts[parent_row] += 1
+        if self._hierarchy is not None and not self._hierarchy.linked(
+            parent_row, child_row
+        ):
+            self._hierarchy = None
+        for listener in self._listeners:
+            listener.task_linked(parent_id, child_id)
+
+    def unlink(self, parent_id: int, child_id: int) -> None:
+        self._thaw()
+        parent_row = self._row(parent_id)
+        child_row = self._row(child_id)
+        if self._parents[child_row] != parent_row:
+            raise ValueError(f"task {child_id} is not a child of task {parent_id}")
+
+        previous_row = self._previous_siblings[child_row]
+        next_row = self._next_siblings[child_row]
+        if previous_row == NO_ROW:
+            self._first_children[parent_row] = next_row
+        else:
+            self._next_siblings[previous_row] = next_row
+        if next_row == NO_ROW:
+            self._last_children[parent_row] = previous_row
+        else:
+            self._previous_siblings[next_row] = previous_row
+
+        self._parents[child_row] = NO_ROW
+        self._previous_siblings[child_row] = NO_ROW
+        self._next_siblings[child_row] = NO_ROW
+        self._child_counts[parent_row] -= 1
+        if self._hierarchy is not None and not self._hierarchy.unlinked(
+            parent_row, child_row
+        ):
+            self._hierarchy = None
+        for listener in self._listeners:
+            listener.task_unlinked(parent_id, child_id)
+
+    def is_ancestor(self, ancestor_id: int, technical_id: int) -> bool:
+        """Whether ancestor_id is above technical_id in the hierarchy."""
+        return self._hierarchy_index().is_ancestor(
+            self._row(ancestor_id), self._row(technical_id)
+        )
+
+    def is_in_subtree(self, technical_id: int, root_id: int) -> bool:
+        return technical_id == root_id or self.is_ancestor(root_id, technical_id)
+
+    def subtree_size(self, technical_id: int) -> int:
+        """Number of tasks in the subtree of technical_id, itself included."""
+        return self._hierarchy_index().sizes[self._row(technical_id)]
+
+    def depth(self, technical_id: int) -> int:
+        """0 for a task without parent."""
+        return self._hierarchy_index().depths[self._row(technical_id)]
+
+    def predecessors(self, technical_id: int) -> List[int]:
+        return list(self._predecessors.get(technical_id, ()))
+
+    def successors(self, technical_id: int) -> List[int]:
+        return list(self._successors.get(technical_id, ()))
+
+    def can_depend(self, predecessor_id: int, successor_id: int) -> bool:
+        """
+        Whether add_dependency would accept the dependency. Only the tasks ordered
+        between both ends are looked at, so it is cheap enough to follow the mouse.
+        """
+        if successor_id in self._successors.get(predecessor_id, ()):
+            return False
+        return self._forward_region(predecessor_id, successor_id) is not None
+
+    def add_dependency(self, predecessor_id: int, successor_id: int) -> None:
+        """
+        Makes successor_id start once predecessor_id is finished. Raises
+        CyclicDependency if predecessor_id already depends on successor_id.
+        """
+        if successor_id in self._successors.get(predecessor_id, ()):
+            raise ValueError(
+                f"task {successor_id} already depends on task {predecessor_id}"
+            )
+        forward = self._forward_region(predecessor_id, successor_id)
+        if forward is None:
+            raise CyclicDependency(
+                f"task {predecessor_id} already depends on task {successor_id}"
+            )
+
+        if forward:
+            # the tasks leading to predecessor_id go before those following
+            # successor_id, in the positions they already take between them.
+            orders = self._orders
+            backward = self._region(
+                predecessor_id,
+                self._predecessors,
+                orders[self._row(successor_id)],
+                orders[self._row(predecessor_id)],
+            )
+            rows = sorted(map(self._row, backward), key=orders.__getitem__)
+            rows += sorted(map(self._row, forward), key=orders.__getitem__)
+            positions = sorted(map(orders.__getitem__, rows))
+            for row, position in zip(rows, positions):
+                orders[row] = position
+
+        self._successors.setdefault(predecessor_id, []).append(successor_id)
+        self._predecessors.setdefault(successor_id, []).append(predecessor_id)
+        for listener in self._listeners:
+            listener.dependency_added(predecessor_id, successor_id)
+
+    def remove_dependency(self, predecessor_id: int, successor_id: int) -> None:
+        successors = self._successors.get(predecessor_id, [])
+        if successor_id not in successors:
+            raise ValueError(
+                f"task {successor_id} does not depend on task {predecessor_id}"
+            )
+
+        successors.remove(successor_id)
+        self._predecessors[successor_id].remove(predecessor_id)
+        for listener in self._listeners:
+            listener.dependency_removed(predecessor_id, successor_id)
+
+    def _forward_region(
+        self, predecessor_id: int, successor_id: int
+    ) -> Optional[List[int]]:
+        """
+        Returns the tasks following successor_id, itself included, that are ordered
+        before predecessor_id and have to move for the dependency to fit in the order.
+        The list is empty if the order already fits, None if the dependency would make
+        a cycle.
+        """
+        orders = self._topological_orders()
+        lower = orders[self._row(successor_id)]
+        upper = orders[self._row(predecessor_id)]
+        if lower > upper:
+            return []
+
+        forward = self._region(successor_id, self._successors, lower, upper)
+        if predecessor_id in forward:
+            return None
+        return forward
+
+    def _region(
+        self,
+        technical_id: int,
+        edges: Dict[int, List[int]],
+        lower: int,
+        upper: int,
+    ) -> List[int]:
+        """
+        The tasks reachable from technical_id through edges, itself included, without
+        going through tasks ordered outside of lower and upper.
+        """
+        orders = self._orders
+        region = [technical_id]
+        seen = {technical_id}
+        for technical_id in region:
+            for next_id in edges.get(technical_id, ()):
+                if next_id not in seen and lower <= orders[self._row(next_id)] <= upper:
+                    seen.add(next_id)
+                    region.append(next_id)
+        return region
+
+    def _topological_orders(self) -> array:
+        """Orders the tasks by Kahn's algorithm, the first time it is needed."""
+        if self._orders is not None:
+            return self._orders
+
+        orders = array("q", [0]) * len(self._ids)
+        in_degrees = {
+            technical_id: len(predecessors)
+            for technical_id, predecessors in self._predecessors.items()
+            if predecessors
+        }
+        ready = [
+            technical_id for technical_id in self._ids if technical_id not in in_degrees
+        ]
+        for position, technical_id in enumerate(ready):
+            orders[self._row(technical_id)] = position
+            for successor_id in self._successors.get(technical_id, ()):
+                in_degrees[successor_id] -= 1
+                if not in_degrees[successor_id]:
+                    ready.append(successor_id)
+        if len(ready) < len(self._ids):
+            raise CyclicDependency("the dependencies of the tasks make a cycle")
+        self._orders = orders
+        return orders
+
+    def _hierarchy_index(self) -> HierarchyIndex:
+        if self._hierarchy is None:
+            self._hierarchy = HierarchyIndex(self)
+        return self._hierarchy
+
+    def _is_above(self, row: int, other_row: int) -> bool:
+        """Whether row is an ancestor of other_row, by the index if already built."""
+        if self._hierarchy is not None:
+            return self._hierarchy.is_ancestor(row, other_row)
+        while other_row != NO_ROW:
+            other_row = self._parents[other_row]
+            if other_row == row:
+                return True
+        return False
+
+    def _thaw(self) -> None:
+        """Turns the children index given to load_columns into the linked lists."""
+        if self._child_offsets is None:
+            return
+        child_offsets = self._child_offsets
+        child_rows = self._child_rows
+        self._child_offsets = self._child_rows = None
+        row_count = len(self._ids)
+
+        # The links are scattered from the children index with map, which keeps the
+        # loops in C.
+        self._child_counts = array("i", map(sub, child_offsets[1:], child_offsets[:-1]))
+        parent_rows = list(compress(range(row_count), self._child_counts))
+        starts = list(map(child_offsets.__getitem__, parent_rows))
+        ends = list(map(child_offsets.__getitem__, map(add, parent_rows, repeat(1))))
+        first_rows = list(map(child_rows.__getitem__, starts))
+        last_rows = list(map(child_rows.__getitem__, map(sub, ends, repeat(1))))
+
+        self._first_children = array("q", [NO_ROW]) * row_count
+        self._last_children = array("q", [NO_ROW]) * row_count
+        _scatter(self._first_children, parent_rows, first_rows)
+        _scatter(self._last_children, parent_rows, last_rows)
+
+        self._previous_siblings = array("q", [NO_ROW]) * row_count
+        self._next_siblings = array("q", [NO_ROW]) * row_count
+        _scatter(self._previous_siblings, child_rows[1:], child_rows[:-1])
+        _scatter(self._next_siblings, child_rows[:-1], child_rows[1:])
+        _scatter(self._previous_siblings, first_rows, repeat(NO_ROW))
+        _scatter(self._next_siblings, last_rows, repeat(NO_ROW))
+
+    def _intern(self, name: str) -> int:
+        if self._string_indexes is None:
+            self._string_indexes = {
+                string: index for index, string in enumerate(self._strings)
+            }
+        index = self._string_indexes.get(name)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(name)
+            self._string_indexes[name] = index
+        return index
+
+    def _id_of(self, row: int) -> Optional[int]:
+        if row == NO_ROW:
+            return None
+        return self._ids[row]
+
+    def _find_row(self, technical_id: int) -> int:
+        if 0 <= technical_id < len(self._rows_by_id):
+            return self._rows_by_id[technical_id]
+        return NO_ROW
+
+    def _row(self, technical_id: int) -> int:
+        row = self._find_row(technical_id)
+        if row == NO_ROW:
+            raise KeyError(technical_id)
+        return row
+
+
+def _scatter(column: array, indexes: Iterable[int], values: Iterable[int]) -> None:
+    """column[index] = value for every pair, without a python level loop."""
+    deque(map(column.__setitem__, indexes, values), maxlen=0)
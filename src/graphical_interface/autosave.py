@@ -0,0 +1,155 @@
+from functools import partial
+from threading import Thread
+from tkinter import Misc
+from typing import Callable, Optional
+
+from src.datamodel.graphics_to_data_interface import (
+    DATABASE_EXTENSION,
+    ApplicationData,
+    write_project,
+)
+from src.datamodel.object_permanence.snapshot import SNAPSHOT_EXTENSION
+from src.datamodel.task_store import TaskStoreListener
+
+# milliseconds without edits before the project is saved.
+AUTOSAVE_DELAY = 2000
+# milliseconds between two looks at a running save.
+POLL_INTERVAL = 100
+
+
+class Autosave(TaskStoreListener):
+    """
+    Saves the project in the background, once the edits have stopped for a while.
+
+    What a save writes is taken on the main thread, between two edits, and written by
+    a worker thread: a copy of the task store, or for snapshots only the edits made
+    since the last save, appended to the journal. Databases are the exception, their
+    connection belongs to the main thread, which commits the edits since the last
+    save there. Edits made while a save runs lead to another save once it is done. Tk
+    is only called from the main thread: the worker is watched through after(), and
+    so is on_status told "saving", "saved" or why the save failed.
+    """
+
+    def __init__(
+        self,
+        widget: Misc,
+        on_status: Callable[[str], None] = lambda status: None,
+        delay: int = AUTOSAVE_DELAY,
+    ):
+        self.widget = widget
+        self.on_status = on_status
+        self.delay = delay
+        self.path: Optional[str] = None
+        self.is_dirty = False
+
+        self._timer: Optional[str] = None
+        self._worker: Optional[Thread] = None
+        self._error: Optional[Exception] = None
+        ApplicationData.tasks.subscribe(self)
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        self.mark_dirty()
+
+    def task_renamed(self, technical_id: int, name: str) -> None:
+        self.mark_dirty()
+
+    def task_linked(self, parent_id: int, child_id: int) -> None:
+        self.mark_dirty()
+
+    def task_unlinked(self, parent_id: int, child_id: int) -> None:
+        self.mark_dirty()
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        self.mark_dirty()
+
+    def dependency_added(self, predecessor_id: int, successor_id: int) -> None:
+        self.mark_dirty()
+
+    def dependency_removed(self, predecessor_id: int, successor_id: int) -> None:
+        self.mark_dirty()
+
+    def store_cleared(self) -> None:
+        self.mark_dirty()
+
+    def start(self, path: str) -> None:
+        """Saves to path from now on, what is in the store is taken as saved."""
+        self.stop()
+        self.path = path
+        self.is_dirty = False
+
+    def stop(self) -> None:
+        self.path = None
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+            self._timer = None
+
+    def mark_dirty(self) -> None:
+        self.is_dirty = True
+        if self.path is None:
+            return
+        # a burst of edits only leads to one save, after the last of them.
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+        self._timer = self.widget.after(self.delay, self.save_now)
+
+    def save_now(self) -> None:
+        self._timer = None
+        if self.path is None:
+            return
+        if self._worker is not None:
+            self.is_dirty = True
+            return
+
+        if self.path.endswith(DATABASE_EXTENSION):
+            self.is_dirty = False
+            # only the edits since the last save are written, in one transaction.
+            try:
+                ApplicationData.save(self.path)
+            except Exception as error:
+                self.on_status(f"save failed: {error}")
+                self.is_dirty = True
+                return
+            self.on_status("saved")
+            return
+
+        # the tasks left in a database opened lazily have to go into the file too,
+        # which is no edit to save again.
+        if self.path != ApplicationData.permanence.path:
+            ApplicationData.permanence.load_remaining()
+            ApplicationData.close_database()
+            if self._timer is not None:
+                self.widget.after_cancel(self._timer)
+                self._timer = None
+        if self.path.endswith(SNAPSHOT_EXTENSION):
+            write = ApplicationData.open_journal(self.path).prepare_save()
+        else:
+            write = partial(write_project, self.path, ApplicationData.tasks.copy())
+        self.is_dirty = False
+        self._worker = Thread(target=self._write, args=(write,))
+        self._worker.start()
+        self.on_status("saving")
+        self.widget.after(POLL_INTERVAL, self._check_worker)
+
+    def _write(self, write: Callable[[], None]) -> None:
+        try:
+            write()
+        except Exception as error:
+            # told on the main thread, see _check_worker.
+            self._error = error
+
+    def _check_worker(self) -> None:
+        if self._worker.is_alive():
+            self.widget.after(POLL_INTERVAL, self._check_worker)
+            return
+
+        self._worker = None
+        if self._error is not None:
+            self.on_status(f"save failed: {self._error}")
+            self._error = None
+            # tried again with the next edit.
+            self.is_dirty = True
+            return
+
+        self.on_status("saved")
+        if self.is_dirty:
+            self.mark_dirty()
@@ -0,0 +1,67 @@
+from tkinter import Misc
+from typing import Callable, List, Optional
+
+from src.datamodel.graphics_to_data_interface import ApplicationData
+from src.datamodel.task_store import TaskStoreListener
+
+
+class ChangeBus(TaskStoreListener):
+    """
+    Tells the views that the tasks of ApplicationData changed, whether through Task or
+    ApplicationData: created, renamed, reparented, rescheduled, their dependencies or
+    their resources, or all removed when the store is cleared.
+
+    However many changes a burst holds, every view is only updated once, from the
+    next after_idle. Which tasks changed is not passed along: every view keeps a
+    TaskChanges of its own, which also lets a hidden view wait until it is shown, and
+    only touches what those hold. A rename then repaints one node in each view.
+    """
+
+    def __init__(self, widget: Misc):
+        self.widget = widget
+        self.views: List[Callable[[], None]] = []
+        self._update: Optional[str] = None
+        ApplicationData.tasks.subscribe(self)
+        ApplicationData.resources.subscribe(self.assignments_changed)
+
+    def subscribe(self, update: Callable[[], None]) -> None:
+        self.views.append(update)
+
+    def unsubscribe(self, update: Callable[[], None]) -> None:
+        self.views.remove(update)
+
+    def task_added(self, technical_id: int, name: str) -> None:
+        self.notify()
+
+    def task_renamed(self, technical_id: int, name: str) -> None:
+        self.notify()
+
+    def task_linked(self, parent_id: int, child_id: int) -> None:
+        self.notify()
+
+    def task_unlinked(self, parent_id: int, child_id: int) -> None:
+        self.notify()
+
+    def task_rescheduled(self, technical_id: int, start: int, duration: int) -> None:
+        self.notify()
+
+    def dependency_added(self, predecessor_id: int, successor_id: int) -> None:
+        self.notify()
+
+    def dependency_removed(self, predecessor_id: int, successor_id: int) -> None:
+        self.notify()
+
+    def store_cleared(self) -> None:
+        self.notify()
+
+    def assignments_changed(self, technical_id: Optional[int]) -> None:
+        self.notify()
+
+    def notify(self) -> None:
+        if self._update is None:
+            self._update = self.widget.after_idle(self.update_views)
+
+    def update_views(self) -> None:
+        self._update = None
+        for update in list(self.views):
+            update()
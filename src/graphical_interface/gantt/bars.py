@@ -0,0 +1,144 @@
+from tkinter import Canvas, HIDDEN, Misc, NORMAL
+from tkinter.ttk import Style
+from typing import Dict, List, Optional, Tuple
+
+from src.datamodel.graphics_to_data_interface import ApplicationData
+from src.datamodel.task_store import NO_DATE
+from src.graphical_interface.gantt.timeline import HEADER_HEIGHT, TimelineHeader
+
+# height of the rows of a Treeview whose style sets none, as Tk has it.
+GANTT_ROW_HEIGHT = 20
+BAR_MARGIN = 4
+
+
+def treeview_row_height(widget: Misc) -> int:
+    """Height of the rows of the Treeviews under the current ttk theme."""
+    row_height = str(Style(widget).lookup("Treeview", "rowheight"))
+    return int(float(row_height)) if row_height else GANTT_ROW_HEIGHT
+
+
+class BarRenderer:
+    """
+    Draws the tasks of ApplicationData as bars on a Gantt canvas, one row per row
+    shown by the task grid beside it and as high, so that every bar stays next to its
+    task.
+
+    rows holds the technical id shown on every row, and row_of the other way round.
+    Canvas items only exist for the bars crossing the view: those leaving it give
+    their item back to a free list, from which those entering it take theirs. A
+    rescheduled task only moves its own bar.
+    """
+
+    def __init__(
+        self,
+        canvas: Canvas,
+        timeline: TimelineHeader,
+        row_height: int = GANTT_ROW_HEIGHT,
+    ):
+        self.canvas = canvas
+        self.timeline = timeline
+        self.row_height = row_height
+        self.rows: List[int] = []
+        self.row_of: Dict[int, int] = {}
+        # canvas item of every bar drawn, by technical id.
+        self.bars: Dict[int, int] = {}
+        self.free_items: List[int] = []
+        # first and last day ordinals of the scheduled tasks.
+        self.first_ordinal: Optional[int] = None
+        self.last_ordinal: Optional[int] = None
+
+    def rebuild_rows(self, rows: List[int]) -> None:
+        """Shows the tasks given from the top row down."""
+        self.rows = rows
+        self.row_of = {technical_id: row for row, technical_id in enumerate(rows)}
+        for technical_id in list(self.bars):
+            if technical_id not in self.row_of:
+                self._release(technical_id)
+
+    def measure_dates(self) -> None:
+        """Finds the first and last days of the tasks, shown or not."""
+        starts, durations = ApplicationData.tasks.schedule_columns()
+        self.first_ordinal = min(filter(None, starts), default=None)
+        self.last_ordinal = max(
+            (
+                start + duration
+                for start, duration in zip(starts, durations)
+                if start != NO_DATE
+            ),
+            default=None,
+        )
+
+    def height(self) -> int:
+        return HEADER_HEIGHT + len(self.rows) * self.row_height
+
+    def draw(self) -> None:
+        """Draws the bars of the rows and dates in view, and only those."""
+        view = self._view()
+        _, top, _, bottom = view
+        first_row = max(0, int((top - HEADER_HEIGHT) // self.row_height))
+        last_row = min(
+            len(self.rows) - 1, int((bottom - HEADER_HEIGHT) // self.row_height)
+        )
+
+        for technical_id in list(self.bars):
+            if not first_row <= self.row_of[technical_id] <= last_row:
+                self._release(technical_id)
+        for row in range(first_row, last_row + 1):
+            self.update_bar(self.rows[row], view)
+
+    def update_bar(
+        self, technical_id: int, view: Optional[Tuple[float, ...]] = None
+    ) -> None:
+        """Brings the bar of one task up to date, if it is in view."""
+        extent = self._extent(technical_id)
+        if extent is None:
+            if technical_id in self.bars:
+                self._release(technical_id)
+            return
+
+        x0, y0, x1, y1 = extent
+        left, top, right, bottom = view or self._view()
+        if x1 < left or x0 > right or y1 < top or y0 > bottom:
+            if technical_id in self.bars:
+                self._release(technical_id)
+            return
+
+        item = self.bars.get(technical_id)
+        if item is None:
+            item = self._acquire(technical_id)
+        self.canvas.coords(item, x0, y0, x1, y1)
+
+    def _view(self) -> Tuple[float, ...]:
+        return (
+            self.canvas.canvasx(0),
+            self.canvas.canvasy(0),
+            self.canvas.canvasx(self.canvas.winfo_width()),
+            self.canvas.canvasy(self.canvas.winfo_height()),
+        )
+
+    def _extent(self, technical_id: int) -> Optional[Tuple[float, ...]]:
+        row = self.row_of.get(technical_id)
+        start = ApplicationData.tasks.start(technical_id)
+        if row is None or start == NO_DATE:
+            return None
+
+        x0 = self.timeline.x_of(start)
+        x1 = self.timeline.x_of(start + ApplicationData.tasks.duration(technical_id))
+        y0 = HEADER_HEIGHT + row * self.row_height + BAR_MARGIN
+        return x0, y0, x1, y0 + self.row_height - 2 * BAR_MARGIN
+
+    def _acquire(self, technical_id: int) -> int:
+        if self.free_items:
+            item = self.free_items.pop()
+            self.canvas.itemconfigure(item, state=NORMAL)
+        else:
+            item = self.canvas.create_rectangle(
+                0, 0, 0, 0, fill="steelblue", outline="navy", tags=("bar",)
+            )
+        self.bars[technical_id] = item
+        return item
+
+    def _release(self, technical_id: int) -> None:
+        item = self.bars.pop(technical_id)
+        self.canvas.itemconfigure(item, state=HIDDEN)
+        self.free_items.append(item)
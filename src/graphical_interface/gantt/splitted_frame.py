@@ -1,4 +1,6 @@
+from datetime import date
 from tkinter import (
+    Event,
     Tk,
     Canvas,
     N,
@@ -9,14 +11,35 @@ from tkinter import (
     RIGHT,
     BOTTOM,
     LEFT,
+    TOP,
+    X,
     CENTER,
     NO,
-    Label,
     PanedWindow, VERTICAL,
 )
-from tkinter.ttk import Labelframe, Frame, Treeview, Scrollbar, Style, Separator
+from typing import Callable, Dict, List, Optional, Set
+from tkinter.ttk import Labelframe, Treeview, Scrollbar, Style, Separator
 
 from src.datamodel.graphics_to_data_interface import ApplicationData
+from src.datamodel.task_store import NO_DATE
+from src.graphical_interface.change_bus import ChangeBus
+from src.graphical_interface.gantt.bars import BarRenderer, treeview_row_height
+from src.graphical_interface.gantt.timeline import (
+    ZOOM_LEVELS,
+    TimelineHeader,
+    start_of_week,
+)
+from src.graphical_interface.search import SearchBar
+
+# days the timeline covers from its first week on, at least.
+TIMELINE_SPAN_DAYS = 5 * 366
+# days left after the last task.
+TIMELINE_MARGIN_DAYS = 90
+# closed rows of the task grid keeping the rows of their children.
+EXPANSION_CACHE_SIZE = 100
+# item id prefix of the rows standing for children not shown yet.
+PLACEHOLDER_PREFIX = "placeholder "
+MATCH_COLOR = "yellow"
 
 
 class SplittedGantt(PanedWindow):
@@ -32,89 +55,237 @@ class SplittedGantt(PanedWindow):
 
         self.TPanedwindow1_p1 = TaskView(self)
         self.add(self.TPanedwindow1_p1)
-        self.TPanedwindow1_p2 = GanttView(self)
+        self.TPanedwindow1_p2 = GanttView(self, self.TPanedwindow1_p1.task_grid)
         self.add(self.TPanedwindow1_p2)
 
+    def refresh(self) -> None:
+        """Shows the changes to ApplicationData, the next <Map> does it if hidden."""
+        self.TPanedwindow1_p1.task_grid.refresh()
+        self.TPanedwindow1_p2.task_grid.refresh()
+
 
 class GanttView(Labelframe):
-    def __init__(self, master=None):
+    """
+    The Gantt canvas, scrolled vertically along with the task grid by the one
+    scrollbar they share, the task grid leading.
+    """
+
+    def __init__(self, master, task_grid: "TaskGrid"):
         super().__init__(master=master, text="Gantt")
-        self.task_grid = GanttDrawer(self)
+        self.task_grid = GanttDrawer(self, task_grid)
 
-        vsb = Scrollbar(self, orient="vertical", command=self.task_grid.yview)
-        vsb.pack(side=RIGHT, expand=True, fill="y")
+        self.vsb = Scrollbar(self, orient="vertical", command=task_grid.yview)
+        self.vsb.pack(side=RIGHT, expand=True, fill="y")
 
-        hsb = Scrollbar(self, orient="horizontal", command=self.task_grid.xview)
-        hsb.pack(side=BOTTOM, expand=True, fill="x")
+        self.hsb = Scrollbar(self, orient="horizontal", command=self.task_grid.xview)
+        self.hsb.pack(side=BOTTOM, expand=True, fill="x")
 
         self.task_grid.pack(side=LEFT, expand=True, fill="both")
-        self.task_grid.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.task_grid.configure(xscrollcommand=self.on_xscroll)
+        task_grid.configure(yscrollcommand=self.on_yscroll)
 
         self.pack(side=LEFT, expand=True, fill="both")
 
+    def on_xscroll(self, first: str, last: str) -> None:
+        self.hsb.set(first, last)
+        self.task_grid.schedule_redraw()
+
+    def on_yscroll(self, first: str, last: str) -> None:
+        self.vsb.set(first, last)
+        self.task_grid.follow_rows(float(first))
+
 
 class GanttDrawer(Canvas):
-    def __init__(self, master):
-        super().__init__(master=master, width=2000, height=2000)
-
-        gdl = GanttDateLine(master)
-
-        self.create_window(0, 0, anchor="nw", window=gdl, width=2000, height=40)
-
-
-class GanttDateLine(Frame):
-    def __init__(self, master):
-        super().__init__(master=master)
-
-        for i in range(20):
-            label = Label(
-                self,
-                width=10,
-                text=f"something_{i}",
-                bg="grey",
-                border=True,
-                justify=LEFT,
-                borderwidth=2,
-                relief="raised",
-            )
-            label.grid(row=0, column=i * 7, columnspan=7, sticky="ew")
-            for j in range(7):
-                label = Label(
-                    self,
-                    width=2,
-                    text=f"{j}",
-                    bg="blue",
-                    border=True,
-                    justify=LEFT,
-                    relief="raised",
-                )
-                label.grid(row=2, column=i * 7 + j)
+    """
+    The bars of the tasks, on the rows the task grid shows them, see BarRenderer.
+    Rows are laid out again on the next idle once the task grid opened, closed or
+    moved some of them. The canvas is never scrolled vertically but to show the rows
+    the task grid shows, which is not confined to the scroll region so that the last
+    rows can line up too.
+    """
+
+    def __init__(self, master, task_grid: "TaskGrid"):
+        super().__init__(
+            master=master, width=2000, height=2000, background="white", confine=False
+        )
+
+        self.task_grid = task_grid
+        self.timeline = TimelineHeader(self, start_of_week(date.today()))
+        self.span_days = TIMELINE_SPAN_DAYS
+        self.bar_renderer = BarRenderer(
+            self, self.timeline, treeview_row_height(task_grid)
+        )
+        # fraction of the rows of the task grid above its view.
+        self.rows_fraction = 0.0
+        self.changes = ApplicationData.tasks.track()
+        self.is_loaded = False
+        self.rows_stale = False
+        self._redraw: Optional[str] = None
+        self.update_scrollregion()
+        task_grid.subscribe(self.rows_changed)
+
+        self.bind("<Map>", lambda e: self.apply_changes())
+        self.bind("<Configure>", lambda e: self.schedule_redraw())
+        self.bind("<Control-MouseWheel>", self.zoom_with_wheel)
+        self.bind("<Control-Button-4>", lambda e: self.zoom(-1, e.x))
+        self.bind("<Control-Button-5>", lambda e: self.zoom(1, e.x))
+
+    def update_scrollregion(self) -> None:
+        """Makes the timeline cover today and every task, and TIMELINE_SPAN_DAYS."""
+        today = date.today().toordinal()
+        first_ordinal = min(today, self.bar_renderer.first_ordinal or today)
+        last_ordinal = max(today, self.bar_renderer.last_ordinal or today)
+        self.timeline.origin = start_of_week(date.fromordinal(first_ordinal))
+        self.span_days = max(
+            TIMELINE_SPAN_DAYS,
+            last_ordinal - self.timeline.origin.toordinal() + TIMELINE_MARGIN_DAYS,
+        )
+
+        width = self.span_days * self.timeline.zoom.pixels_per_day
+        self.configure(scrollregion=(0, 0, width, self.bar_renderer.height()))
+
+    def refresh(self) -> None:
+        if self.winfo_ismapped():
+            self.apply_changes()
+
+    def apply_changes(self) -> None:
+        """
+        Brings the bars up to date with the changes made to ApplicationData since they
+        were last drawn. Rows are only laid out again when tasks were created or moved
+        in the hierarchy, a rescheduled task only has its own bar redrawn.
+        """
+        if not self.changes and self.is_loaded:
+            return
+
+        if (
+            not self.is_loaded
+            or self.changes.reset
+            or self.changes.created
+            or self.changes.relinked
+        ):
+            self.changes.clear()
+            self.is_loaded = True
+            self.bar_renderer.measure_dates()
+            self.rows_stale = True
+            self.redraw()
+            return
+
+        rescheduled = list(self.changes.rescheduled)
+        self.changes.clear()
+        origin = self.timeline.origin
+        for technical_id in rescheduled:
+            start = ApplicationData.tasks.start(technical_id)
+            if start == NO_DATE:
+                continue
+            end = start + ApplicationData.tasks.duration(technical_id)
+            renderer = self.bar_renderer
+            renderer.first_ordinal = min(renderer.first_ordinal or start, start)
+            renderer.last_ordinal = max(renderer.last_ordinal or end, end)
+        self.update_scrollregion()
+        if self.timeline.origin != origin:
+            self.redraw()
+            return
+        for technical_id in rescheduled:
+            self.bar_renderer.update_bar(technical_id)
+
+    def zoom_with_wheel(self, event: Event) -> None:
+        self.zoom(-1 if event.delta > 0 else 1, event.x)
+
+    def zoom(self, step: int, x: int) -> None:
+        """Zooms step levels out, in if negative, keeping the day under x in place."""
+        index = ZOOM_LEVELS.index(self.timeline.zoom) + step
+        if not 0 <= index < len(ZOOM_LEVELS):
+            return
+
+        days = self.canvasx(x) / self.timeline.zoom.pixels_per_day
+        self.timeline.zoom = ZOOM_LEVELS[index]
+        self.update_scrollregion()
+        width = self.span_days * self.timeline.zoom.pixels_per_day
+        self.xview_moveto((days * self.timeline.zoom.pixels_per_day - x) / width)
+        self.redraw()
+
+    def rows_changed(self) -> None:
+        """Called by the task grid when rows were shown, hidden or moved."""
+        self.rows_stale = True
+        self.schedule_redraw()
+
+    def follow_rows(self, first: float) -> None:
+        """Called by the task grid when scrolled, first being its yview."""
+        self.rows_fraction = first
+        self.schedule_redraw()
+
+    def schedule_redraw(self) -> None:
+        if self._redraw is None:
+            self._redraw = self.after_idle(self.redraw)
+
+    def redraw(self) -> None:
+        if self._redraw is not None:
+            self.after_cancel(self._redraw)
+            self._redraw = None
+        if self.rows_stale:
+            self.rows_stale = False
+            self.bar_renderer.rebuild_rows(self.task_grid.visible_ids())
+            self.update_scrollregion()
+        renderer = self.bar_renderer
+        self.yview_moveto(
+            self.rows_fraction
+            * len(renderer.rows)
+            * renderer.row_height
+            / renderer.height()
+        )
+        renderer.draw()
+        self.timeline.draw()
 
 
 class TaskView(Labelframe):
     def __init__(self, master=None):
         super().__init__(master=master, width=250, text="Tasks")
         self.task_grid = TaskGrid(self)
+        self.search_bar = SearchBar(self, [self.task_grid])
+        self.search_bar.pack(side=TOP, fill=X)
 
-        vsb = Scrollbar(self, orient="vertical", command=self.task_grid.yview)
-        vsb.pack(side=RIGHT, expand=True, fill="y", pady=(20,0))
-
+        # scrolled vertically by the scrollbar of the GanttView beside it.
         hsb = Scrollbar(self, orient="horizontal", command=self.task_grid.xview)
         hsb.pack(side=BOTTOM, expand=True, fill="x")
 
         self.task_grid.pack(side=LEFT, expand=True, fill="both", pady=(20,0))
-        self.task_grid.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.task_grid.configure(xscrollcommand=hsb.set)
 
         self.pack_propagate(False)
 
 
 class TaskGrid(Treeview):
-    def __init__(self, master=None):
-        super().__init__(master=master, columns=["1", "2", "3", "4"], height=2000, selectmode="extended", show="headings")
+    """
+    Lists the tasks of ApplicationData nested in their hierarchy, one row per task,
+    whose item id is its technical id.
+
+    Only the rows that can be seen exist: the top level ones, and the children of the
+    rows opened. A closed row with children holds a placeholder instead, replaced by
+    the real rows when it is opened, fetched from the permanence if needed. Closed rows
+    keep their children until more than cache_size of them do, the ones closed the
+    longest ago going back to a placeholder first.
+
+    sync brings the rows up to date with the changes made since its last call: new
+    tasks get a row, moved ones are put under their new parent and renamed ones or
+    those whose dependencies or subtree totals changed have their values refreshed.
+    The other rows are left alone.
+
+    Listeners are called whenever rows may have been shown, hidden or moved, before
+    Tk has opened or closed the row clicked.
+    """
+
+    def __init__(self, master=None, cache_size: int = EXPANSION_CACHE_SIZE):
+        super().__init__(
+            master=master,
+            columns=["1", "2", "3", "4", "5", "6", "7"],
+            height=2000,
+            selectmode="extended",
+            show="tree headings",
+        )
         style = Style()
         style.theme_use('alt')
 
-        self.column("#0", anchor=CENTER, stretch=NO, width=20)
+        self.column("#0", anchor=W, stretch=NO, width=80)
         self.heading("#0", text="tree")
 
         self.column("1", anchor=CENTER, stretch=NO, width=30)
@@ -128,14 +299,269 @@ class TaskGrid(Treeview):
         self.column("4", anchor=CENTER, stretch=NO, width=80)
         self.heading("4", text="successor")
 
+        self.column("5", anchor=CENTER, stretch=NO, width=50)
+        self.heading("5", text="tasks")
+        self.column("6", anchor=CENTER, stretch=NO, width=60)
+        self.heading("6", text="effort")
+        self.column("7", anchor=CENTER, stretch=NO, width=70)
+        self.heading("7", text="cost")
+
+        self.cache_size = cache_size
+        self.changes = ApplicationData.tasks.track()
+        self.rollup_changes = ApplicationData.rollups.track()
+        self.is_loaded = False
+        # technical ids of the tasks whose children have rows.
+        self.populated: Set[int] = set()
+        # those of them closed, the least recently first.
+        self.closed: Dict[int, None] = {}
+        # technical ids of the tasks found by the search bar.
+        self.matches: Set[int] = set()
+        self.tag_configure("match", background=MATCH_COLOR)
+        self.row_listeners: List[Callable[[], None]] = []
+
+        self.bind("<Map>", lambda e: self.sync())
+        self.bind("<<TreeviewOpen>>", lambda e: self.open_row(self.focus()))
+        self.bind("<<TreeviewClose>>", lambda e: self.close_row(self.focus()))
+
+    def subscribe(self, listener: Callable[[], None]) -> None:
+        self.row_listeners.append(listener)
+
+    def rows_changed(self) -> None:
+        for listener in self.row_listeners:
+            listener()
+
     def reload(self):
-        for tasks in ApplicationData.tasks:
-            self.insert(
-                "", "end", open=True, values=[tasks.name, tasks.parent, tasks.children]
-            )
+        """Builds every row again."""
+        self.clear()
+        self.sync()
+
+    def refresh(self) -> None:
+        if self.winfo_ismapped():
+            self.sync()
+
+    def sync(self) -> None:
+        if not self.is_loaded or self.changes.reset:
+            self.clear()
+            self.is_loaded = True
+            for technical_id in sorted(ApplicationData.tasks.roots()):
+                self.insert_task("end", ApplicationData.get_task(technical_id))
+            self.rows_changed()
+            return
+        if not self.changes and not self.rollup_changes:
+            return
+
+        store = ApplicationData.tasks
+        moved = {**self.changes.created, **self.changes.relinked}
+        updated = {
+            **self.changes.renamed,
+            **self.changes.redepended,
+            **self.rollup_changes.changed,
+        }
+        if self.rollup_changes.reset:
+            updated.update(dict.fromkeys(self.shown_ids()))
+        self.changes.clear()
+        self.rollup_changes.clear()
+        if moved:
+            self.rows_changed()
+
+        # rows moved below a parent not showing its children go first, the rows below
+        # them go along.
+        for technical_id in moved:
+            if self.exists(str(technical_id)) and (
+                technical_id not in store
+                or not self.is_populated(store.parent(technical_id))
+            ):
+                self.delete_row(str(technical_id))
+        parents = {}
+        for technical_id in moved:
+            if technical_id not in store:
+                continue
+            parent_id = store.parent(technical_id)
+            parents[parent_id] = None
+            if not self.is_populated(parent_id):
+                continue
+            if self.exists(str(technical_id)):
+                updated[technical_id] = None
+            else:
+                # put at the top level until their parent has a row too.
+                self.insert_task("end", ApplicationData.get_task(technical_id), "")
+
+        # the children of every parent concerned are put back in order at once, which
+        # also takes the moved rows away from their former parent.
+        for parent_id in parents:
+            if parent_id is None:
+                self.set_children("", *map(str, sorted(store.roots())))
+            elif self.is_populated(parent_id):
+                self.set_children(
+                    str(parent_id), *map(str, store.children(parent_id))
+                )
+            elif self.exists(str(parent_id)):
+                self.add_placeholder(parent_id)
+
+        for technical_id in updated:
+            if technical_id in store and self.exists(str(technical_id)):
+                self.item(
+                    str(technical_id),
+                    values=self.task_values(ApplicationData.get_task(technical_id)),
+                )
+
+    def visible_ids(self) -> List[int]:
+        """Technical ids of the tasks whose row can be seen, from the top down."""
+        ids = []
+        stack = list(reversed(self.get_children()))
+        while stack:
+            row = stack.pop()
+            if row.startswith(PLACEHOLDER_PREFIX):
+                continue
+            ids.append(int(row))
+            if self.item(row, "open"):
+                stack.extend(reversed(self.get_children(row)))
+        return ids
+
+    def shown_ids(self) -> List[int]:
+        """Technical ids of the tasks having a row, open or not."""
+        ids = []
+        stack = list(self.get_children())
+        while stack:
+            row = stack.pop()
+            if not row.startswith(PLACEHOLDER_PREFIX):
+                ids.append(int(row))
+                stack.extend(self.get_children(row))
+        return ids
+
+    def is_populated(self, parent_id: Optional[int]) -> bool:
+        return parent_id is None or parent_id in self.populated
+
+    def insert_task(self, index, task, parent: Optional[str] = None):
+        """
+        Adds the row of a task, under the row of its parent unless told otherwise, with
+        a placeholder if it has children.
+        """
+        if parent is None:
+            parent_id = task.store.parent(task.technical_id)
+            parent = "" if parent_id is None else str(parent_id)
+        self.insert(
+            parent,
+            index,
+            iid=str(task.technical_id),
+            open=False,
+            values=self.task_values(task),
+            tags=("match",) if task.technical_id in self.matches else (),
+        )
+        self.add_placeholder(task.technical_id)
+
+    @staticmethod
+    def task_values(task):
+        rollups = ApplicationData.rollups
+        return [
+            task.technical_id,
+            task.name,
+            task.predecessors,
+            task.successors,
+            rollups.count(task.technical_id),
+            f"{rollups.effort(task.technical_id):g}",
+            f"{rollups.cost(task.technical_id):.2f}",
+        ]
+
+    def add_placeholder(self, technical_id: int) -> None:
+        """Shows the row as openable if the task has children, and none shown."""
+        row = str(technical_id)
+        if self.get_children(row):
+            return
+        if ApplicationData.tasks.child_count(
+            technical_id
+        ) or ApplicationData.has_unloaded_children(technical_id):
+            self.insert(row, "end", iid=PLACEHOLDER_PREFIX + row, text="...")
+
+    def highlight(self, technical_ids: List[int]) -> None:
+        """Tags the rows of the tasks given, and only them, rows made later included."""
+        previous = self.matches
+        self.matches = set(technical_ids)
+        for technical_id in previous.symmetric_difference(self.matches):
+            if self.exists(str(technical_id)):
+                self.item(
+                    str(technical_id),
+                    tags=("match",) if technical_id in self.matches else (),
+                )
+
+    def show(self, technical_id: int) -> None:
+        """Opens the rows above the task, then selects it and scrolls to it."""
+        self.sync()
+        store = ApplicationData.tasks
+        if technical_id not in store:
+            return
+        ancestors = []
+        parent_id = store.parent(technical_id)
+        while parent_id is not None:
+            ancestors.append(parent_id)
+            parent_id = store.parent(parent_id)
+        for ancestor_id in reversed(ancestors):
+            self.open_row(str(ancestor_id))
+            self.item(str(ancestor_id), open=True)
+        row = str(technical_id)
+        self.see(row)
+        self.selection_set(row)
+        self.focus(row)
+
+    def open_row(self, row: str) -> None:
+        """Replaces the placeholder of the row by the rows of its children."""
+        if not row or row.startswith(PLACEHOLDER_PREFIX):
+            return
+        self.rows_changed()
+        technical_id = int(row)
+        self.closed.pop(technical_id, None)
+        if technical_id in self.populated:
+            return
+
+        self.populated.add(technical_id)
+        self.delete(*self.get_children(row))
+        if ApplicationData.has_unloaded_children(technical_id):
+            ApplicationData.load_children(technical_id)
+        for child_id in ApplicationData.tasks.children(technical_id):
+            if not self.exists(str(child_id)):
+                self.insert_task("end", ApplicationData.get_task(child_id), row)
+        self.set_children(
+            row, *map(str, ApplicationData.tasks.children(technical_id))
+        )
+
+    def close_row(self, row: str) -> None:
+        """Keeps the children of the row, dropping those of the rows closed first."""
+        if not row or row.startswith(PLACEHOLDER_PREFIX):
+            return
+        self.rows_changed()
+        self.closed[int(row)] = None
+        while len(self.closed) > self.cache_size:
+            technical_id = next(iter(self.closed))
+            del self.closed[technical_id]
+            self.release_children(technical_id)
+
+    def release_children(self, technical_id: int) -> None:
+        """Deletes the rows below the task, leaving a placeholder instead."""
+        row = str(technical_id)
+        for child in self.get_children(row):
+            self.delete_row(child)
+        self.populated.discard(technical_id)
+        self.add_placeholder(technical_id)
+
+    def delete_row(self, row: str) -> None:
+        """Deletes the row and those below it, forgetting which were populated."""
+        stack = [row]
+        while stack:
+            item = stack.pop()
+            stack.extend(self.get_children(item))
+            if not item.startswith(PLACEHOLDER_PREFIX):
+                self.populated.discard(int(item))
+                self.closed.pop(int(item), None)
+        self.delete(row)
 
     def clear(self):
-        pass
+        self.delete(*self.get_children())
+        self.changes.clear()
+        self.rollup_changes.clear()
+        self.is_loaded = False
+        self.populated = set()
+        self.closed = {}
+        self.rows_changed()
 
 
 if __name__ == "__main__":
@@ -147,6 +573,8 @@ if __name__ == "__main__":
             self.bind("<Control-w>", lambda e: self.destroy())
             frame = SplittedGantt(self)
             frame.pack(fill="both", expand=True)
+            self.change_bus = ChangeBus(self)
+            self.change_bus.subscribe(frame.refresh)
 
     runner = Runner()
     runner.title("Gantt")
@@ -0,0 +1,176 @@
+from datetime import date, timedelta
+from tkinter import Canvas, HIDDEN, NORMAL
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+HEADER_HEIGHT = 40
+ROW_HEIGHT = HEADER_HEIGHT // 2
+
+# (ordinal of the first day of a unit, label of the unit)
+Tick = Tuple[int, str]
+
+
+class TimeUnit(NamedTuple):
+    starts: Callable[[date], bool]
+    short_label: Callable[[date], str]
+    long_label: Callable[[date], str]
+
+
+DAY = TimeUnit(
+    lambda day: True,
+    lambda day: str(day.day),
+    lambda day: f"{day:%d %b %Y}",
+)
+WEEK = TimeUnit(
+    lambda day: day.weekday() == 0,
+    lambda day: f"W{day.isocalendar()[1]}",
+    lambda day: f"W{day.isocalendar()[1]} {day:%d %b %Y}",
+)
+MONTH = TimeUnit(
+    lambda day: day.day == 1,
+    lambda day: f"{day:%b}",
+    lambda day: f"{day:%B %Y}",
+)
+QUARTER = TimeUnit(
+    lambda day: day.day == 1 and day.month % 3 == 1,
+    lambda day: f"Q{(day.month - 1) // 3 + 1}",
+    lambda day: f"Q{(day.month - 1) // 3 + 1} {day.year}",
+)
+YEAR = TimeUnit(
+    lambda day: day.day == 1 and day.month == 1,
+    lambda day: str(day.year),
+    lambda day: str(day.year),
+)
+
+
+class ZoomLevel(NamedTuple):
+    name: str
+    pixels_per_day: float
+    minor: TimeUnit
+    major: TimeUnit
+
+
+ZOOM_LEVELS = (
+    ZoomLevel("day", 24, DAY, WEEK),
+    ZoomLevel("week", 8, WEEK, MONTH),
+    ZoomLevel("month", 2, MONTH, YEAR),
+    ZoomLevel("quarter", 0.6, QUARTER, YEAR),
+)
+
+
+def start_of_week(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class TimelineHeader:
+    """
+    The date header of a Gantt canvas, drawn on the canvas itself.
+
+    Only the ticks in view have canvas items, recycled from one redraw to the next. The
+    ticks of every year are computed once per zoom level and kept, so panning only
+    moves and relabels a handful of items.
+    """
+
+    def __init__(self, canvas: Canvas, origin: date):
+        self.canvas = canvas
+        self.origin = origin
+        self.zoom = ZOOM_LEVELS[0]
+
+        self._ticks: Dict[Tuple[str, int], Tuple[List[Tick], List[Tick]]] = {}
+        # (line, text) item pairs, the first _used of them show a tick.
+        self._items: List[Tuple[int, int]] = []
+        self._used = 0
+        self.background = canvas.create_rectangle(
+            0, 0, 0, 0, fill="grey85", outline="", tags=("timeline",)
+        )
+        self.separator = canvas.create_line(
+            0, 0, 0, 0, fill="grey40", tags=("timeline",)
+        )
+
+    def x_of(self, ordinal: int) -> float:
+        """Left edge of the day of the ordinal given, on the canvas."""
+        return (ordinal - self.origin.toordinal()) * self.zoom.pixels_per_day
+
+    def day_at(self, x: float) -> date:
+        return self.origin + timedelta(days=x // self.zoom.pixels_per_day)
+
+    def ticks_of_year(self, year: int) -> Tuple[List[Tick], List[Tick]]:
+        """Returns the major and minor ticks of the year, at the current zoom level."""
+        key = (self.zoom.name, year)
+        ticks = self._ticks.get(key)
+        if ticks is None:
+            major: List[Tick] = []
+            minor: List[Tick] = []
+            day = date(year, 1, 1)
+            while day.year == year:
+                if self.zoom.major.starts(day):
+                    major.append((day.toordinal(), self.zoom.major.long_label(day)))
+                if self.zoom.minor.starts(day):
+                    minor.append((day.toordinal(), self.zoom.minor.short_label(day)))
+                day += timedelta(days=1)
+            ticks = self._ticks[key] = (major, minor)
+        return ticks
+
+    def draw(self) -> None:
+        """Draws the ticks of the dates in view, at the top of the view."""
+        left = self.canvas.canvasx(0)
+        right = self.canvas.canvasx(self.canvas.winfo_width())
+        top = self.canvas.canvasy(0)
+        first_day = self.day_at(left)
+        last_day = self.day_at(right)
+
+        self.canvas.coords(self.background, left, top, right, top + HEADER_HEIGHT)
+        self.canvas.coords(
+            self.separator, left, top + ROW_HEIGHT, right, top + ROW_HEIGHT
+        )
+
+        self._used = 0
+        first_ordinal = first_day.toordinal()
+        last_ordinal = last_day.toordinal()
+        for year in range(first_day.year, last_day.year + 1):
+            major, minor = self.ticks_of_year(year)
+            for ordinal, label in major:
+                if first_ordinal < ordinal <= last_ordinal:
+                    self._show(ordinal, label, top, left)
+            for ordinal, label in minor:
+                if first_ordinal <= ordinal <= last_ordinal:
+                    self._show(ordinal, label, top + ROW_HEIGHT, left)
+
+        # the unit begun before the view keeps its label at the left edge.
+        ongoing = first_day
+        while not self.zoom.major.starts(ongoing):
+            ongoing -= timedelta(days=1)
+        self._show(
+            ongoing.toordinal(),
+            self.zoom.major.long_label(ongoing),
+            top,
+            left,
+            with_line=False,
+        )
+
+        for line, text in self._items[self._used :]:
+            self.canvas.itemconfigure(line, state=HIDDEN)
+            self.canvas.itemconfigure(text, state=HIDDEN)
+        self.canvas.tag_raise("timeline")
+
+    def _show(
+        self, ordinal: int, label: str, top: float, left: float, with_line=True
+    ) -> None:
+        if self._used == len(self._items):
+            self._items.append(
+                (
+                    self.canvas.create_line(
+                        0, 0, 0, 0, fill="grey40", tags=("timeline",)
+                    ),
+                    self.canvas.create_text(
+                        0, 0, anchor="w", font=("TkDefaultFont", 8), tags=("timeline",)
+                    ),
+                )
+            )
+        line, text = self._items[self._used]
+        self._used += 1
+
+        x = self.x_of(ordinal)
+        self.canvas.coords(line, x, top, x, top + ROW_HEIGHT)
+        self.canvas.itemconfigure(line, state=NORMAL if with_line else HIDDEN)
+        self.canvas.coords(text, max(x, left) + 3, top + ROW_HEIGHT / 2)
+        self.canvas.itemconfigure(text, text=label, state=NORMAL)
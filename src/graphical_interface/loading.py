@@ -0,0 +1,194 @@
+from queue import Empty, Queue
+from threading import Event, Thread
+from tkinter import Misc
+from typing import Any, Callable, NamedTuple, Optional
+
+from src.datamodel.graphics_to_data_interface import (
+    DATABASE_EXTENSION,
+    ApplicationData,
+    read_project,
+)
+from src.datamodel.object_permanence.snapshot import SNAPSHOT_EXTENSION
+from src.datamodel.object_permanence.tasks import TechnicalIdGen
+from src.datamodel.task_store import DEFAULT_DURATION, NO_DATE, TaskStore
+
+# tasks moved into ApplicationData per idle call.
+LOAD_CHUNK_SIZE = 2000
+# milliseconds between two looks at the worker while it has nothing ready.
+POLL_INTERVAL = 50
+
+
+class ProjectSize(NamedTuple):
+    """First message of the worker, once the file is read."""
+
+    task_count: int
+    id_limit: int
+
+
+class ProjectLoader:
+    """
+    Loads a project file without blocking Tk.
+
+    A worker thread reads the file into a store of its own, then queues its tasks
+    level by level, roots first, in chunks. The main thread moves one chunk at a time
+    into ApplicationData from after_idle, so the window stays responsive and the views
+    show the top levels while the deeper ones are still coming. on_chunk is called once
+    the tasks loaded have doubled since its last call, which keeps the redrawing linear
+    in the size of the project.
+    """
+
+    def __init__(
+        self,
+        widget: Misc,
+        on_chunk: Callable[[], None],
+        on_progress: Callable[[int, int], None] = lambda loaded, total: None,
+        on_status: Callable[[str], None] = lambda status: None,
+    ):
+        self.widget = widget
+        self.on_chunk = on_chunk
+        self.on_progress = on_progress
+        self.on_status = on_status
+
+        self.chunks: "Queue[Any]" = Queue()
+        self.cancelled = Event()
+        self.total = 0
+        self.loaded = 0
+        self.shown = 0
+        self._next_feed: Optional[str] = None
+
+    @property
+    def is_loading(self) -> bool:
+        return self._next_feed is not None
+
+    def start(self, path: str) -> None:
+        if self.is_loading:
+            self.cancel()
+
+        if path.endswith((DATABASE_EXTENSION, SNAPSHOT_EXTENSION)):
+            # only the roots of a database are read, the rest comes on demand anyway,
+            # and a snapshot is read as whole columns, then its journal replayed.
+            try:
+                ApplicationData.load(path)
+            except Exception as error:
+                ApplicationData.tasks.clear()
+                self.on_chunk()
+                self.on_status(f"loading failed: {error}")
+                return
+            self.on_chunk()
+            self.on_status("loaded")
+            return
+
+        ApplicationData.close_database()
+        ApplicationData.tasks.clear()
+        ApplicationData.resources.clear()
+        self.chunks = Queue()
+        self.cancelled = Event()
+        self.total = self.loaded = self.shown = 0
+        Thread(
+            target=self._read, args=(path, self.chunks, self.cancelled), daemon=True
+        ).start()
+        self.on_status("loading")
+        self._next_feed = self.widget.after(POLL_INTERVAL, self._feed)
+
+    def cancel(self) -> None:
+        """Stops the loading, and drops the tasks loaded so far."""
+        if not self.is_loading:
+            return
+        self.cancelled.set()
+        self.widget.after_cancel(self._next_feed)
+        self._next_feed = None
+        ApplicationData.tasks.clear()
+        self.on_chunk()
+        self.on_status("loading cancelled")
+
+    @staticmethod
+    def _read(path: str, chunks: "Queue[Any]", cancelled: Event) -> None:
+        """
+        Runs in the worker thread. Queues the ProjectSize, then lists of (technical
+        id, name, parent id, start, duration) in which parents come before their
+        children, then the dependencies as (predecessor, successor) pairs and None at
+        the end, or the error that stopped the reading.
+        """
+        store = TaskStore()
+        try:
+            read_project(path, store, cancelled)
+        except Exception as error:
+            # whatever stops the reading has to reach _feed, which waits for it.
+            chunks.put(error)
+            return
+        if cancelled.is_set():
+            return
+        chunks.put(ProjectSize(len(store), store.id_limit()))
+
+        chunk = []
+        level = list(store.roots())
+        while level:
+            next_level = []
+            for technical_id in level:
+                chunk.append(
+                    (
+                        technical_id,
+                        store.name(technical_id),
+                        store.parent(technical_id),
+                        store.start(technical_id),
+                        store.duration(technical_id),
+                    )
+                )
+                next_level.extend(store.iter_children(technical_id))
+                if len(chunk) == LOAD_CHUNK_SIZE:
+                    if cancelled.is_set():
+                        return
+                    chunks.put(chunk)
+                    chunk = []
+            level = next_level
+        chunks.put(chunk)
+        chunks.put(tuple(zip(*store.dependency_columns())))
+        chunks.put(None)
+
+    def _feed(self) -> None:
+        try:
+            self._feed_message()
+        except Exception as error:
+            # such as a task created meanwhile under an id of the file, before the
+            # ProjectSize came.
+            self.cancelled.set()
+            self._next_feed = None
+            self.on_status(f"loading failed: {error}")
+
+    def _feed_message(self) -> None:
+        try:
+            message = self.chunks.get_nowait()
+        except Empty:
+            self._next_feed = self.widget.after(POLL_INTERVAL, self._feed)
+            return
+
+        if message is None:
+            self._next_feed = None
+            self.on_chunk()
+            self.on_status("loaded")
+            return
+        if isinstance(message, Exception):
+            self._next_feed = None
+            self.on_status(f"loading failed: {message}")
+            return
+
+        if isinstance(message, ProjectSize):
+            self.total = message.task_count
+            # tasks created from now on, while loading, get ids the file does not use.
+            TechnicalIdGen.set_minimum(message.id_limit)
+        elif isinstance(message, tuple):
+            for predecessor_id, successor_id in message:
+                ApplicationData.tasks.add_dependency(predecessor_id, successor_id)
+        else:
+            for technical_id, name, parent_id, start, duration in message:
+                ApplicationData.tasks.add(technical_id, name)
+                if start != NO_DATE or duration != DEFAULT_DURATION:
+                    ApplicationData.tasks.reschedule(technical_id, start, duration)
+                if parent_id is not None:
+                    ApplicationData.tasks.link(parent_id, technical_id)
+            self.loaded += len(message)
+            self.on_progress(self.loaded, self.total)
+            if self.loaded >= 2 * self.shown:
+                self.shown = self.loaded
+                self.on_chunk()
+        self._next_feed = self.widget.after_idle(self._feed)
@@ -0,0 +1,126 @@
+import tkinter
+from tkinter import BOTTOM, LEFT, RIGHT, X, Y, ttk
+from tkinter.messagebox import showerror
+from tkinter.simpledialog import askfloat, askinteger, askstring
+from typing import Optional
+
+from src.datamodel.graphics_to_data_interface import ApplicationData
+from src.datamodel.leveling import ResourceLeveler
+from src.datamodel.resources import Resource
+
+
+class ResourceFrame(tkinter.Frame):
+    """
+    Lists the resources of the project, how many tasks need each of them and on how
+    many days they are needed beyond their capacity, and levels the project.
+    """
+
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.leveler = ResourceLeveler(ApplicationData.tasks, ApplicationData.resources)
+
+        buttons = tkinter.Frame(self)
+        buttons.pack(side=BOTTOM, fill=X)
+        ttk.Button(buttons, text="add resource", command=self.add_resource).pack(
+            side=LEFT
+        )
+        ttk.Button(buttons, text="assign to task", command=self.assign).pack(
+            side=LEFT
+        )
+        ttk.Button(buttons, text="level", command=self.level).pack(side=RIGHT)
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=["name", "capacity", "cost", "tasks", "overallocated"],
+            show="headings",
+            selectmode="browse",
+        )
+        self.tree.heading("name", text="name")
+        self.tree.heading("capacity", text="capacity")
+        self.tree.heading("cost", text="cost per unit and day")
+        self.tree.heading("tasks", text="tasks")
+        self.tree.heading("overallocated", text="days overallocated")
+        vsb = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        vsb.pack(side=RIGHT, fill=Y)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=LEFT, fill="both", expand=True)
+
+        self.bind("<Map>", lambda e: self.refresh())
+        self._refresh: Optional[str] = None
+        ApplicationData.resources.subscribe(self.assignments_changed)
+
+    def assignments_changed(self, technical_id: Optional[int]) -> None:
+        # the pool is emptied when another project is loaded.
+        if technical_id is None and self._refresh is None:
+            self._refresh = self.after_idle(self.refresh)
+
+    def refresh(self) -> None:
+        self._refresh = None
+        self.leveler.measure()
+        overallocated = self.leveler.overallocated_days()
+        pool = ApplicationData.resources
+        self.tree.delete(*self.tree.get_children())
+        for index, resource in enumerate(pool.resources):
+            self.tree.insert(
+                "",
+                "end",
+                iid=str(index),
+                values=[
+                    resource.name,
+                    resource.capacity,
+                    resource.cost,
+                    len(pool.tasks_of(index)),
+                    int(overallocated[index]),
+                ],
+            )
+
+    def selected_resource(self) -> Optional[int]:
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+
+    def add_resource(self) -> None:
+        name = askstring("Resource", "name", parent=self)
+        if not name:
+            return
+        capacity = askfloat(
+            "Resource", "units per day", parent=self, initialvalue=1.0, minvalue=0.0
+        )
+        if capacity is None:
+            return
+        cost = askfloat(
+            "Resource",
+            "cost per unit and day",
+            parent=self,
+            initialvalue=0.0,
+            minvalue=0.0,
+        )
+        if cost is None:
+            return
+        ApplicationData.resources.add(Resource(name, capacity, cost=cost))
+        self.refresh()
+
+    def assign(self) -> None:
+        index = self.selected_resource()
+        if index is None:
+            return
+        technical_id = askinteger("Assignment", "task id", parent=self)
+        if technical_id is None or technical_id not in ApplicationData.tasks:
+            return
+        units = askfloat("Assignment", "units", parent=self, initialvalue=1.0)
+        if units is None:
+            return
+        try:
+            ApplicationData.resources.assign(technical_id, index, units)
+        except ValueError:
+            return
+        self.refresh()
+
+    def level(self) -> None:
+        """Delays the tasks needing resources beyond their capacity."""
+        try:
+            self.leveler.level()
+        except ValueError as error:
+            showerror("Leveling", str(error), parent=self)
+            return
+        self.leveler.apply()
+        self.refresh()
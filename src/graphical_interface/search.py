@@ -0,0 +1,74 @@
+import tkinter
+from tkinter import LEFT, RIGHT, X, ttk
+from typing import Any, List, Optional
+
+from src.datamodel.graphics_to_data_interface import ApplicationData
+
+# tasks highlighted at most, the first ones by technical id.
+MATCH_LIMIT = 1000
+
+
+class SearchBar(tkinter.Frame):
+    """
+    Finds the tasks as their name is typed, see NameIndex. The views, WBSCanvas or
+    TaskGrid, highlight every match and scroll to the current one, Return and
+    Shift-Return going to the next and previous ones, Escape clearing the search.
+
+    The search is made on the next after_idle, so that keys typed in a burst only
+    cost one query.
+    """
+
+    def __init__(self, master, views: List[Any]):
+        super().__init__(master)
+        self.views = views
+        self.matches: List[int] = []
+        self.current = 0
+        self._search: Optional[str] = None
+
+        self.text_var = tkinter.StringVar(master=self)
+        self.prefix_var = tkinter.BooleanVar(master=self, value=False)
+        self.entry = ttk.Entry(self, textvariable=self.text_var)
+        self.entry.pack(side=LEFT, fill=X, expand=True)
+        ttk.Checkbutton(
+            self,
+            text="starts with",
+            variable=self.prefix_var,
+            command=self.schedule_search,
+        ).pack(side=LEFT)
+        self.count_label = ttk.Label(self, width=12)
+        self.count_label.pack(side=RIGHT)
+
+        self.text_var.trace_add("write", lambda *args: self.schedule_search())
+        self.entry.bind("<Return>", lambda e: self.step(1))
+        self.entry.bind("<Shift-Return>", lambda e: self.step(-1))
+        self.entry.bind("<Escape>", lambda e: self.text_var.set(""))
+
+    def schedule_search(self) -> None:
+        if self._search is None:
+            self._search = self.after_idle(self.search)
+
+    def search(self) -> None:
+        self._search = None
+        self.matches = ApplicationData.names.search(
+            self.text_var.get(), prefix=self.prefix_var.get(), limit=MATCH_LIMIT
+        )
+        self.current = 0
+        for view in self.views:
+            view.highlight(self.matches)
+        self.show_current()
+
+    def step(self, offset: int) -> None:
+        if self.matches:
+            self.current = (self.current + offset) % len(self.matches)
+            self.show_current()
+
+    def show_current(self) -> None:
+        if not self.matches:
+            self.count_label.configure(text="" if not self.text_var.get() else "0")
+            return
+        count = len(self.matches)
+        self.count_label.configure(
+            text=f"{self.current + 1}/{count}{'+' if count == MATCH_LIMIT else ''}"
+        )
+        for view in self.views:
+            view.show(self.matches[self.current])
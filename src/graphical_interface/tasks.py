@@ -1,8 +1,10 @@
+from datetime import date
 from tkinter import Toplevel, Widget, Entry, StringVar, END, Frame
 from tkinter.ttk import Button
 from typing import Tuple, Optional
 
 from src.datamodel.object_permanence.tasks import Task
+from src.datamodel.task_store import DEFAULT_DURATION
 
 
 def create_new_task(master: Widget) -> Optional[Task]:
@@ -24,13 +26,19 @@ class TaskWindow(Toplevel):
         self.task = task
         self.is_validated = False
         self.name_var = StringVar(master=self)
+        self.start_var = StringVar(master=self)
+        self.duration_var = StringVar(master=self)
 
     def make_gui(self) -> None:
 
         if self.task is None:
             name = "undefined"
+            start = None
+            duration = DEFAULT_DURATION
         else:
             name = self.task.name
+            start = self.task.start
+            duration = self.task.duration
 
         self.grab_set()
         self.name_var.set(name)
@@ -38,6 +46,11 @@ class TaskWindow(Toplevel):
         task_title_entry.pack(anchor="n")
         task_title_entry.focus_set()
         task_title_entry.select_range(0, END)
+        # start as YYYY-MM-DD, left empty for a task not scheduled yet.
+        self.start_var.set("" if start is None else start.isoformat())
+        Entry(self, justify="left", textvariable=self.start_var).pack(anchor="n")
+        self.duration_var.set(str(duration))
+        Entry(self, justify="left", textvariable=self.duration_var).pack(anchor="n")
         button = Button(self, text="Done", command=self.validate)
         button.pack(anchor="s")
         self.bind("<Return>", lambda e: self.validate())
@@ -54,16 +67,30 @@ class TaskWindow(Toplevel):
         out.make_gui()
         return out
 
-    def get_task_values(self) -> Tuple[str]:
-        return (self.name_var.get(),)
+    def get_task_values(self) -> Tuple[str, Optional[date], int]:
+        """Name, start and duration typed in, ignoring invalid dates and durations."""
+        try:
+            start = date.fromisoformat(self.start_var.get().strip())
+        except ValueError:
+            start = None
+        try:
+            duration = max(1, int(self.duration_var.get()))
+        except ValueError:
+            duration = DEFAULT_DURATION
+        return self.name_var.get(), start, duration
 
     def get_new_task(self) -> Optional[Task]:
         if self.is_validated:
-            return Task(*self.get_task_values())
+            name, start, duration = self.get_task_values()
+            return Task(name, start=start, duration=duration)
 
     def modify_task(self) -> Optional[Task]:
         if self.is_validated:
-            self.task.name = self.name_var.get()
+            name, start, duration = self.get_task_values()
+            if name != self.task.name:
+                self.task.name = name
+            if (start, duration) != (self.task.start, self.task.duration):
+                self.task.reschedule(start, duration)
             return self.task
 
     def validate(self):
@@ -1,17 +1,34 @@
 import os.path
 import tkinter
+from contextlib import contextmanager
 from tkinter import Canvas, Tk, Event, NW, Label, LEFT, ttk, BOTTOM, X, RIGHT, Y, ALL
-from typing import Tuple, Optional, List
+from tkinter import HIDDEN, NORMAL, TOP
+from typing import Tuple, Optional, List, Dict, Iterator, Set
 
 from src import SRC_ROOT_FOLDER
-from src.datamodel.graphics_to_data_interface import ApplicationData
+from src.datamodel.graphics_to_data_interface import ApplicationData, TaskBatch
 from src.datamodel.object_permanence.tasks import OnlyOneParent, NoChildOfItself, Task
+from src.graphical_interface.change_bus import ChangeBus
+from src.graphical_interface.search import SearchBar
 from src.graphical_interface.tasks import create_new_task, modify_task
+from src.graphical_interface.work_breakdown_structure.layout import (
+    NodeGrid,
+    TreeLayout,
+)
 
 TASK_DEFAULT_WIDTH = 100
 TASK_DEFAULT_WIDTH_STEP = 200
 TASK_DEFAULT_HEIGHT = 50
 TASK_DEFAULT_HEIGHT_STEP = 100
+TASK_COLOR = "grey"
+MATCH_COLOR = "yellow"
+# task under the end of an arrow being dragged, depending on whether it can be linked.
+DROP_COLOR = "pale green"
+INVALID_DROP_COLOR = "tomato"
+
+# tasks this far out of the viewport still get a label, so that slow scrolling does
+# not show them popping in.
+VIEWPORT_MARGIN = TASK_DEFAULT_WIDTH_STEP
 
 DEFAULT_FILE_PATH = os.path.join(SRC_ROOT_FOLDER, "temp.json")
 
@@ -21,34 +38,70 @@ class WBSFrame(tkinter.Frame):
         super().__init__(master)
 
         self.canvas = WBSCanvas(self)
+        self.search_bar = SearchBar(self, [self.canvas])
+        self.search_bar.pack(side=TOP, fill=X)
 
         self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
         self.vsb.pack(side=RIGHT, fill=Y)
         self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.canvas.xview)
         self.hsb.pack(side=BOTTOM, fill=X)
 
-        self.canvas.configure(xscrollcommand=self.hsb.set, yscrollcommand=self.vsb.set)
+        self.canvas.configure(
+            xscrollcommand=self.on_xscroll, yscrollcommand=self.on_yscroll
+        )
         self.canvas.pack(side=LEFT, fill="both", expand=True)
 
+    def on_xscroll(self, first: str, last: str) -> None:
+        self.hsb.set(first, last)
+        self.canvas.schedule_viewport_update()
+
+    def on_yscroll(self, first: str, last: str) -> None:
+        self.vsb.set(first, last)
+        self.canvas.schedule_viewport_update()
+
     def reload(self):
         self.canvas.reload()
 
+    def refresh(self) -> None:
+        """Shows the changes made to ApplicationData, the next <Map> does it if hidden."""
+        if self.canvas.winfo_ismapped():
+            self.canvas.apply_changes()
+
 
 class WBSCanvas(Canvas):
     def __init__(self, master=None):
         super().__init__(master)
         self.configure(background="azure")
 
-        self.tasks: List[WBSTaskGraphicalHandler] = []
-        self.arrows: List[ArrowHandler] = []
-        self.tree_structure_handler = TreeStructureHandler(self)
+        self.tasks: Dict[int, WBSTaskGraphicalHandler] = {}
+        # arrows by technical id of the child they point to.
+        self.arrows: Dict[int, ArrowHandler] = {}
+        self.arrow_items: Dict[int, ArrowHandler] = {}
+        # technical ids of the children whose arrow has to be redrawn.
+        self.stale_arrows: Dict[int, None] = {}
+        self.tree_layout = TreeLayout(ApplicationData.tasks)
+        self.node_grid = NodeGrid(TASK_DEFAULT_WIDTH_STEP, TASK_DEFAULT_HEIGHT_STEP)
+        self.changes = ApplicationData.tasks.track()
+        self.rollup_changes = ApplicationData.rollups.track()
+        self.is_loaded = False
+        self.label_pool = LabelPool(self)
+        self._viewport_update: Optional[str] = None
+        # tasks in view whose children are still to be fetched from the permanence.
+        self.tasks_to_expand: Dict[int, None] = {}
+        self._children_fetch: Optional[str] = None
+        # technical ids of the tasks found by the search bar.
+        self.matches: Set[int] = set()
+        self.width = self.height = 0
+        self.drop_target: Optional[WBSTaskGraphicalHandler] = None
+        self.is_drop_valid = False
         self.bind("<Double-1>", self.create_task)
         self.bind("<Map>", self.load_when_visible)
-        self.bind("<Unmap>", self.clear_when_no_longer_visible)
+        self.bind("<Configure>", lambda e: self.schedule_viewport_update())
         # TODO: add non-bugged zoom
 
         self.tag_bind("arrow", "<Enter>", self.change_cursor_when_on_arrow)
         self.tag_bind("arrow", "<Leave>", self.change_cursor_when_leave)
+        self.tag_bind("arrow", "<Button-1>", self.delete_clicked_arrow)
 
     def change_cursor_when_on_arrow(self, event: Event):
         self.config(cursor="X_cursor")
@@ -56,14 +109,30 @@ class WBSCanvas(Canvas):
     def change_cursor_when_leave(self, event: Event):
         self.config(cursor="")
 
+    def delete_clicked_arrow(self, event: Event):
+        arrow = self.arrow_items.get(self.find_withtag("current")[0])
+        if arrow is not None:
+            arrow.delete()
+
     def create_task(self, event: Event) -> None:
         new_task = create_new_task(self)
         if new_task is None:
             return
 
         ApplicationData.add_task(new_task)
-        self.tasks.append(WBSTaskGraphicalHandler(self, new_task))
-        self.organize()
+        self.changes.created.pop(new_task.technical_id, None)
+        self.tasks[new_task.technical_id] = WBSTaskGraphicalHandler(self, new_task)
+        self.organize(self.tree_layout.add(new_task.technical_id))
+
+    @contextmanager
+    def batch(self) -> Iterator[TaskBatch]:
+        """
+        ApplicationData.batch, after which the canvas is laid out and redrawn once,
+        whatever the number of edits.
+        """
+        with ApplicationData.batch() as batch:
+            yield batch
+        self.apply_changes()
 
     def create_relation(
         self,
@@ -77,128 +146,270 @@ class WBSCanvas(Canvas):
             raise InvalidLink
 
         arrow.end = other_task
-        self.arrows.append(arrow)
-        self.organize()
+        self.add_arrow(arrow)
+        self.changes.relinked.pop(other_task.task_data.technical_id, None)
+        self.organize(
+            self.tree_layout.link(
+                first_task.task_data.technical_id, other_task.task_data.technical_id
+            )
+        )
+        self.config(cursor="")
 
     def delete_relation(self, arrow: "ArrowHandler") -> None:
         arrow.start.task_data.remove_child(arrow.end.task_data)
-        self.arrows.remove(arrow)
-        self.organize()
-
-    def organize(self):
-        self.delete("arrow")
-
-        tree = self.tree_structure_handler.make_tree(
-            id_list=[
-                task.task_data.technical_id
-                for task in self.tasks
-                if task.task_data.parent is None
-            ]
-        )
-        tree = [(self.id_to_graphical_handler(task), x, y) for task, x, y in tree]
-        for task, x, y in tree:
-            y -= 1
-            self.coords(
-                task.rect, x * TASK_DEFAULT_WIDTH_STEP, y * TASK_DEFAULT_HEIGHT_STEP
+        self.forget_arrow(arrow.end.task_data.technical_id)
+        self.changes.relinked.pop(arrow.end.task_data.technical_id, None)
+        self.organize(
+            self.tree_layout.unlink(
+                arrow.start.task_data.technical_id, arrow.end.task_data.technical_id
             )
+        )
+
+    def add_arrow(self, arrow: "ArrowHandler") -> None:
+        technical_id = arrow.end.task_data.technical_id
+        self.arrows[technical_id] = arrow
+        self.arrow_items[arrow.graphical_arrow] = arrow
+        self.stale_arrows[technical_id] = None
 
-        for arrow in self.arrows:
-            arrow.draw_between_start_and_end()
+    def forget_arrow(self, technical_id: int) -> None:
+        arrow = self.arrows.pop(technical_id)
+        del self.arrow_items[arrow.graphical_arrow]
+        self.stale_arrows.pop(technical_id, None)
 
-        self.configure(scrollregion=self.bbox("all"))
+    def organize(self, first_root: int = 0):
+        """
+        Moves the tasks to their place in the layout, and redraws only the arrows that
+        are new or that have one of their ends moved. The roots before the index
+        first_root, left in place by the last change of the layout, are not visited;
+        the scroll region then never shrinks in height.
+        """
+        right = 0
+        bottom = self.height if first_root else 0
+        for technical_id, x, y in self.tree_layout.positions(first_root=first_root):
+            task = self.id_to_graphical_handler(technical_id)
+            if task.move_to(x * TASK_DEFAULT_WIDTH_STEP, y * TASK_DEFAULT_HEIGHT_STEP):
+                self.stale_arrows[technical_id] = None
+                for child in ApplicationData.tasks.iter_children(technical_id):
+                    self.stale_arrows[child] = None
+            right = max(right, task.x + TASK_DEFAULT_WIDTH)
+            bottom = max(bottom, task.y + TASK_DEFAULT_HEIGHT)
+        self.width = right
+        self.height = bottom
+        self.configure(scrollregion=(0, 0, right, bottom))
+        self.update_viewport()
+
+        for technical_id in self.stale_arrows:
+            arrow = self.arrows.get(technical_id)
+            if arrow is not None:
+                arrow.draw_between_start_and_end()
+        self.stale_arrows.clear()
 
     def id_to_graphical_handler(self, technical_id: int) -> "WBSTaskGraphicalHandler":
-        return next(
-            task for task in self.tasks if task.task_data.technical_id == technical_id
-        )
+        return self.tasks[technical_id]
+
+    def highlight(self, technical_ids: List[int]) -> None:
+        """Paints the labels of the tasks given, and only them, in MATCH_COLOR."""
+        previous = self.matches
+        self.matches = set(technical_ids)
+        for technical_id in previous.symmetric_difference(self.matches):
+            task = self.tasks.get(technical_id)
+            if task is not None and task.label is not None:
+                task.label.show(task)
+
+    def task_at(self, x: float, y: float) -> Optional["WBSTaskGraphicalHandler"]:
+        technical_id = self.node_grid.at(x, y)
+        if technical_id is None:
+            return None
+        return self.tasks.get(technical_id)
+
+    def set_drop_target(
+        self, task: Optional["WBSTaskGraphicalHandler"], is_valid: bool = False
+    ) -> None:
+        """Paints the task under a dragged arrow, and the previous one back."""
+        previous = self.drop_target
+        self.drop_target = task
+        self.is_drop_valid = is_valid
+        for changed in (previous, task):
+            if changed is not None and changed.label is not None:
+                changed.label.show(changed)
+
+    def color_of(self, task: "WBSTaskGraphicalHandler") -> str:
+        if task is self.drop_target:
+            return DROP_COLOR if self.is_drop_valid else INVALID_DROP_COLOR
+        if task.task_data.technical_id in self.matches:
+            return MATCH_COLOR
+        return TASK_COLOR
+
+    def show(self, technical_id: int) -> None:
+        """Scrolls the task to the middle of the view."""
+        if technical_id not in self.tasks:
+            self.apply_changes()
+        task = self.tasks.get(technical_id)
+        if task is None or not self.width or not self.height:
+            return
+        x = task.x + (TASK_DEFAULT_WIDTH - self.winfo_width()) / 2
+        y = task.y + (TASK_DEFAULT_HEIGHT - self.winfo_height()) / 2
+        self.xview_moveto(max(0.0, x / self.width))
+        self.yview_moveto(max(0.0, y / self.height))
+        self.update_viewport()
+
+    def schedule_viewport_update(self) -> None:
+        if self._viewport_update is None:
+            self._viewport_update = self.after_idle(self.update_viewport)
+
+    def update_viewport(self) -> None:
+        """Gives a label to the tasks in view, and takes it back from the others."""
+        if self._viewport_update is not None:
+            self.after_cancel(self._viewport_update)
+            self._viewport_update = None
+
+        x0 = self.canvasx(0) - VIEWPORT_MARGIN
+        y0 = self.canvasy(0) - VIEWPORT_MARGIN
+        x1 = self.canvasx(self.winfo_width()) + VIEWPORT_MARGIN
+        y1 = self.canvasy(self.winfo_height()) + VIEWPORT_MARGIN
+        # only the tasks around the viewport and those holding a label are looked at.
+        in_view = self.node_grid.in_rect(x0, y0, x1, y1)
+        for task in list(self.label_pool.holders.values()):
+            technical_id = task.task_data.technical_id
+            if technical_id not in in_view and task.real_arrow is None:
+                self.label_pool.release(task)
+        for technical_id in in_view:
+            task = self.tasks[technical_id]
+            if task.label is None:
+                self.label_pool.acquire(task)
+            if ApplicationData.has_unloaded_children(technical_id):
+                self.tasks_to_expand[technical_id] = None
+
+        if self.tasks_to_expand and self._children_fetch is None:
+            self._children_fetch = self.after_idle(self.fetch_children)
+
+    def fetch_children(self) -> None:
+        """
+        Brings the children of the tasks in view into ApplicationData, then draws them.
+        Those in view in turn get their children on the next idle, level by level.
+        """
+        self._children_fetch = None
+        for technical_id in self.tasks_to_expand:
+            ApplicationData.load_children(technical_id)
+        self.tasks_to_expand.clear()
+        self.apply_changes()
+
+    def lower_below_tasks(self, item: int) -> None:
+        if self.find_withtag("window"):
+            self.tag_lower(item, "window")
 
     def clear(self):
-        self.delete("window")
+        for task in list(self.label_pool.holders.values()):
+            self.label_pool.release(task)
         self.delete("arrow")
-        self.tasks = []
+        self.node_grid.clear()
+        self.drop_target = None
+        self.tasks = {}
+        self.arrows = {}
+        self.arrow_items = {}
+        self.stale_arrows = {}
+        self.tasks_to_expand = {}
 
     def load_when_visible(self, event: Event) -> None:
         self.focus_set()
-        self.reload()
+        self.apply_changes()
+
+    def apply_changes(self) -> None:
+        """
+        Brings the scene up to date with the changes made to ApplicationData by others
+        since it was last drawn. Nothing is redrawn when there are none, and only the
+        tasks whose totals changed get their text again.
+        """
+        if not self.is_loaded or self.changes.reset:
+            self.reload()
+            return
+        if not self.changes:
+            self.refresh_totals()
+            return
+
+        created = list(self.changes.created)
+        renamed = list(self.changes.renamed)
+        relinked = list(self.changes.relinked)
+        self.changes.clear()
+
+        for technical_id in created:
+            if technical_id not in self.tasks:
+                self.tasks[technical_id] = WBSTaskGraphicalHandler(
+                    self, ApplicationData.get_task(technical_id)
+                )
+        for technical_id in renamed:
+            self.tasks[technical_id].refresh_text()
+        for technical_id in relinked:
+            parent_id = ApplicationData.tasks.parent(technical_id)
+            arrow = self.arrows.get(technical_id)
+            if arrow is not None and arrow.start.task_data.technical_id != parent_id:
+                self.delete(arrow.graphical_arrow)
+                self.forget_arrow(technical_id)
+                arrow = None
+            if arrow is None and parent_id is not None:
+                self.add_arrow(
+                    ArrowHandler.from_start_and_end(
+                        self.tasks[parent_id], self.tasks[technical_id]
+                    )
+                )
+
+        if relinked:
+            self.tree_layout.rebuild()
+            self.organize()
+        elif created:
+            self.organize(
+                min(self.tree_layout.add(technical_id) for technical_id in created)
+            )
+        self.refresh_totals()
+
+    def refresh_totals(self) -> None:
+        if self.rollup_changes.reset:
+            for task in self.label_pool.holders.values():
+                task.refresh_text()
+        for technical_id in self.rollup_changes.changed:
+            task = self.tasks.get(technical_id)
+            if task is not None and task.label is not None:
+                task.refresh_text()
+        self.rollup_changes.clear()
 
     def reload(self) -> None:
         self.clear()
-        self.tasks = [
-            WBSTaskGraphicalHandler(self, task) for task in ApplicationData.tasks
-        ]
-        ids_to_graphical_handler = {
-            task.task_data.technical_id: task for task in self.tasks
+        self.changes.clear()
+        self.rollup_changes.clear()
+        self.is_loaded = True
+        self.tasks = {
+            task.technical_id: WBSTaskGraphicalHandler(self, task)
+            for task in ApplicationData.iter_tasks()
         }
         tasks_to_link = [
-            (task, ids_to_graphical_handler[child])
-            for task in self.tasks
-            for child in task.task_data.children
-        ]
-        self.arrows = [
-            ArrowHandler.from_start_and_end(start, end) for start, end in tasks_to_link
+            (self.tasks[technical_id], self.tasks[child])
+            for technical_id in self.tasks
+            for child in ApplicationData.tasks.iter_children(technical_id)
         ]
+        for start, end in tasks_to_link:
+            self.add_arrow(ArrowHandler.from_start_and_end(start, end))
+        self.tree_layout.rebuild()
         self.organize()
 
-    def clear_when_no_longer_visible(self, event: Event) -> None:
-        self.clear()
-
 
 class InvalidLink(Exception):
     pass
 
 
-class TreeStructureHandler:
-    def __init__(self, canvas: WBSCanvas):
-        self.canvas = canvas
-
-    def make_tree(
-        self,
-        start_id: int = -1,
-        x_offset: int = 0,
-        y: int = 0,
-        id_list: Optional[List[int]] = None,
-    ) -> List[Tuple[int, int, int]]:
-        if id_list is not None:
-            children = id_list
-        else:
-            children = self.canvas.id_to_graphical_handler(start_id).task_data.children
-
-        if not children:
-            if start_id == -1:
-                return []
-            return [(start_id, x_offset, y)]
-        tree = []
-
-        for child in children:
-            child_tree = self.make_tree(child, x_offset, y + 1)
-            x_offset = max(x for _, x, _ in child_tree) + 1
-
-            tree.extend(child_tree)
+class PooledLabel:
+    """
+    A Label embedded in the canvas, lent to whichever task is currently displayed
+    through it. Its bindings forward the events to that task.
+    """
 
-        children_only_tree = [(task, x, y) for task, x, y in tree if task in children]
-        x_of_children = [x for task, x, _ in children_only_tree]
-        if len(x_of_children) == 1:
-            x_pos_parent = max(x_of_children)
-        else:
-            x_pos_parent = (max(x_of_children) + min(x_of_children)) / 2
-
-        if start_id != -1:
-            tree.append((start_id, x_pos_parent, y))
-
-        return tree
-
-
-class WBSTaskGraphicalHandler:
-    def __init__(self, canvas: WBSCanvas, task: Task):
+    def __init__(self, canvas: WBSCanvas):
         self.canvas = canvas
-        self.task_data = task
-        self.graphical_id = f"{self.task_data.name}_{self.task_data.technical_id}"
+        self.task: Optional[WBSTaskGraphicalHandler] = None
 
         self.text_widget = Label(
             master=self.canvas,
-            bg="grey",
+            bg=TASK_COLOR,
             border=True,
-            text=self.graphical_id,
             justify=LEFT,
             anchor=NW,
             wraplength=TASK_DEFAULT_WIDTH,
@@ -209,54 +420,157 @@ class WBSTaskGraphicalHandler:
             anchor=NW,
             height=TASK_DEFAULT_HEIGHT,
             width=TASK_DEFAULT_WIDTH,
-            tags=(
-                "window",
-                self.graphical_id,
-            ),
+            state=HIDDEN,
+            tags=("window",),
             window=self.text_widget,
         )
 
+        self.text_widget.bind("<Button1-Motion>", lambda e: self.task.arrow_drag(e))
+        self.text_widget.bind(
+            "<Button1-ButtonRelease>", lambda e: self.task.link_rect(e)
+        )
+        self.text_widget.bind("<Double-1>", lambda e: self.task.modify_task(e))
+
+    def show(self, task: "WBSTaskGraphicalHandler") -> None:
+        self.task = task
+        self.text_widget.configure(text=task.text(), bg=self.canvas.color_of(task))
+        self.canvas.coords(self.rect, task.x, task.y)
+        self.canvas.itemconfigure(self.rect, state=NORMAL)
+
+    def hide(self) -> None:
+        self.task = None
+        self.canvas.itemconfigure(self.rect, state=HIDDEN)
+
+
+class LabelPool:
+    """
+    Hands out PooledLabel to the tasks that are in view and takes them back once the
+    tasks scroll out of it, so that the number of widgets only depends on the size
+    of the viewport.
+    """
+
+    def __init__(self, canvas: WBSCanvas):
+        self.canvas = canvas
+        self.free_labels: List[PooledLabel] = []
+        # the tasks holding a label, by technical id.
+        self.holders: Dict[int, "WBSTaskGraphicalHandler"] = {}
+
+    def acquire(self, task: "WBSTaskGraphicalHandler") -> None:
+        if self.free_labels:
+            label = self.free_labels.pop()
+        else:
+            label = PooledLabel(self.canvas)
+        label.show(task)
+        task.label = label
+        self.holders[task.task_data.technical_id] = task
+
+    def release(self, task: "WBSTaskGraphicalHandler") -> None:
+        task.label.hide()
+        self.free_labels.append(task.label)
+        task.label = None
+        del self.holders[task.task_data.technical_id]
+
+
+class WBSTaskGraphicalHandler:
+    """
+    A task of the WBS. It always knows where it is laid out, and so does the node grid
+    of the canvas, but only holds a Label while it is close enough to the viewport to
+    be seen.
+    """
+
+    def __init__(self, canvas: WBSCanvas, task: Task):
+        self.canvas = canvas
+        self.task_data = task
+        self.graphical_id = f"{self.task_data.name}_{self.task_data.technical_id}"
+
+        self.x = 0
+        self.y = 0
+        self.label: Optional[PooledLabel] = None
+        canvas.node_grid.move(
+            task.technical_id, 0, 0, TASK_DEFAULT_WIDTH, TASK_DEFAULT_HEIGHT
+        )
+
         self.real_arrow: Optional[ArrowHandler] = None
 
-        self.text_widget.bind("<Button1-Motion>", self.arrow_drag)
-        self.text_widget.bind("<Button1-ButtonRelease>", self.link_rect)
-        self.text_widget.bind("<Double-1>", self.modify_task)
+    @property
+    def rect(self) -> Optional[int]:
+        if self.label is None:
+            return None
+        return self.label.rect
+
+    def text(self) -> str:
+        """The name and id of the task, above the totals of its subtree."""
+        technical_id = self.task_data.technical_id
+        rollups = ApplicationData.rollups
+        return (
+            f"{self.graphical_id}\n{rollups.count(technical_id)} tasks, "
+            f"{rollups.effort(technical_id):g} d, {rollups.cost(technical_id):.2f}"
+        )
+
+    def refresh_text(self) -> None:
+        self.graphical_id = f"{self.task_data.name}_{self.task_data.technical_id}"
+        if self.label is not None:
+            self.label.text_widget.configure(text=self.text())
+
+    def move_to(self, x: float, y: float) -> bool:
+        """Returns whether the task actually moved."""
+        if (x, y) == (self.x, self.y):
+            return False
+        self.x = x
+        self.y = y
+        self.canvas.node_grid.move(
+            self.task_data.technical_id,
+            x,
+            y,
+            x + TASK_DEFAULT_WIDTH,
+            y + TASK_DEFAULT_HEIGHT,
+        )
+        if self.label is not None:
+            self.canvas.coords(self.label.rect, x, y)
+        return True
 
     def get_mouse_position_from_rect(self, event: Event) -> Tuple[int, int]:
-        x_rect, y_rect = self.canvas.coords(self.rect)
-        return event.x + x_rect, event.y + y_rect
+        return event.x + self.x, event.y + self.y
 
     def arrow_drag(self, event: Event):
         xm, ym = self.get_mouse_position_from_rect(event)
 
         if self.real_arrow is None:
+            self.canvas.config(cursor="boat")
             self.real_arrow = ArrowHandler(self.canvas, xm, ym, self)
         else:
             self.real_arrow.update_end(xm, ym)
 
+        target = self.canvas.task_at(xm, ym)
+        if target is self:
+            target = None
+        if target is not self.canvas.drop_target:
+            self.canvas.set_drop_target(
+                target,
+                target is not None
+                and self.task_data.can_be_parent_of(target.task_data),
+            )
+
     def link_rect(self, event: Event):
         if self.real_arrow is None:
             return
 
         xm, ym = self.get_mouse_position_from_rect(event)
-        other_rect = self.canvas.find_closest(
-            xm, ym, start=self.real_arrow.graphical_arrow
-        )[0]
+        other_task = self.canvas.task_at(xm, ym)
+        self.canvas.set_drop_target(None)
         try:
-            other_task = next(
-                task for task in self.canvas.tasks if task.rect == other_rect
-            )
+            if other_task is None:
+                raise InvalidLink
             self.canvas.create_relation(self, other_task)
-        except (StopIteration, InvalidLink):
+        except InvalidLink:
             # no rectangle to link to or linking is invalid.
             self.real_arrow.delete()
         finally:
             self.real_arrow = None
 
     def modify_task(self, event: Event):
-        new_task = modify_task(self.canvas, self.task_data)
-        if new_task is not None:
-            self.text_widget.configure(text=new_task.name)
+        # the rename comes back through the change bus, see WBSFrame.refresh.
+        modify_task(self.canvas, self.task_data)
 
     def __repr__(self):
         return self.graphical_id
@@ -271,7 +585,6 @@ class ArrowHandler:
         start_task: WBSTaskGraphicalHandler,
     ):
         self.canvas = canvas
-        self.canvas.config(cursor="boat")
 
         self.x0 = start_x
         self.y0 = start_y
@@ -281,10 +594,11 @@ class ArrowHandler:
         )
 
         # remember this line else we could not find the rectangle we want to link to.
-        self.canvas.tag_lower(self.graphical_arrow, "window")
+        self.canvas.lower_below_tasks(self.graphical_arrow)
 
         self.start = start_task
         self.end: Optional[WBSTaskGraphicalHandler] = None
+        self.points: Optional[Tuple[float, ...]] = None
 
     @classmethod
     def from_start_and_end(
@@ -314,14 +628,14 @@ class ArrowHandler:
              |
 
         with bends at the two intersection.
-        """
-        x0, y0 = self.canvas.coords(self.start.rect)
-        x0 += TASK_DEFAULT_WIDTH // 2
-        y0 += TASK_DEFAULT_HEIGHT
 
-        x1, y1 = self.canvas.coords(self.end.rect)
+        The line is drawn once and then only moved, when one of its ends has moved.
+        """
+        x0 = self.start.x + TASK_DEFAULT_WIDTH // 2
+        y0 = self.start.y + TASK_DEFAULT_HEIGHT
 
-        x1 += TASK_DEFAULT_WIDTH // 2
+        x1 = self.end.x + TASK_DEFAULT_WIDTH // 2
+        y1 = self.end.y
         curve_factor = 0.5
         curve_dist = min(
             abs((1 - curve_factor) * (y1 - y0) // 2),
@@ -347,8 +661,7 @@ class ArrowHandler:
         )
         end = (x1, y1)
 
-        self.canvas.delete(self.graphical_arrow)
-        self.graphical_arrow = self.canvas.create_line(
+        points = (
             *start,
             *waypoint1_curve_start,
             *waypoint1,
@@ -357,15 +670,13 @@ class ArrowHandler:
             *waypoint2,
             *waypoint2_curve_end,
             *end,
-            arrow="last",
-            tags=("arrow",),
-            smooth=True,
-        )
-        self.canvas.tag_lower(self.graphical_arrow, "window")
-        self.canvas.tag_bind(
-            self.graphical_arrow, "<Button-1>", lambda e: self.delete()
         )
-        self.canvas.config(cursor="")
+        if points == self.points:
+            return
+        if self.points is None:
+            self.canvas.itemconfigure(self.graphical_arrow, smooth=True)
+        self.canvas.coords(self.graphical_arrow, *points)
+        self.points = points
 
 
 if __name__ == "__main__":
@@ -377,6 +688,8 @@ if __name__ == "__main__":
             self.bind("<Control-w>", lambda e: self.destroy())
             frame = WBSFrame(self)
             frame.pack(fill="both", expand=True)
+            self.change_bus = ChangeBus(self)
+            self.change_bus.subscribe(frame.refresh)
 
     runner = Runner()
     runner.title("WBS")
@@ -0,0 +1,280 @@
+import math
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.datamodel.task_store import TaskStore
+
+
+class TreeLayout:
+    """
+    Places the tasks of a TaskStore as a top-down tree, in grid units.
+
+    Leaves take consecutive columns in depth first order and every parent is centred
+    over its first and last child. Instead of absolute coordinates, each task keeps
+    the width of its subtree (in columns), the offset of its subtree from the left
+    edge of its parent's subtree and its own position inside its subtree. Linking or
+    unlinking a task then only updates the ancestors of the change and shifts their
+    right-hand siblings, and absolute positions are resolved in one pass when needed.
+
+    Roots are laid out from left to right in technical id order, which is their
+    creation order.
+    """
+
+    def __init__(self, store: TaskStore):
+        self.store = store
+        self._widths = array("l")
+        self._lefts = array("l")
+        self._centers = array("d")
+        self._roots: List[int] = []
+
+    def rebuild(self) -> None:
+        self._widths = array("l")
+        self._lefts = array("l")
+        self._centers = array("d")
+        self._roots = sorted(self.store.roots())
+
+        for root in self._roots:
+            self._grow(root)
+            stack = [(root, False)]
+            while stack:
+                technical_id, children_done = stack.pop()
+                if children_done:
+                    self._place_children(technical_id)
+                    continue
+                stack.append((technical_id, True))
+                for child in self.store.iter_children(technical_id):
+                    self._grow(child)
+                    stack.append((child, False))
+
+    def add(self, technical_id: int) -> int:
+        """Returns the index of the first root whose subtree moved, see positions."""
+        self._grow(technical_id)
+        self._widths[technical_id] = 1
+        self._lefts[technical_id] = 0
+        self._centers[technical_id] = 0
+        insort(self._roots, technical_id)
+        return bisect_left(self._roots, technical_id)
+
+    def link(self, parent_id: int, child_id: int) -> int:
+        """
+        To be called once child_id has been appended to the children of parent_id.
+        Returns the index of the first root whose subtree moved, see positions.
+        """
+        child_index = bisect_left(self._roots, child_id)
+        del self._roots[child_index]
+
+        previous_id = self.store.previous_sibling(child_id)
+        if previous_id is None:
+            self._lefts[child_id] = 0
+        else:
+            self._lefts[child_id] = self._lefts[previous_id] + self._widths[previous_id]
+        self._refresh(parent_id)
+        return min(child_index, self._root_index(parent_id))
+
+    def unlink(self, parent_id: int, child_id: int) -> int:
+        """
+        To be called once child_id has been removed from the children of parent_id.
+        Returns the index of the first root whose subtree moved, see positions.
+        """
+        left = self._lefts[child_id]
+        width = self._widths[child_id]
+        for sibling in self.store.iter_children(parent_id):
+            if self._lefts[sibling] > left:
+                self._lefts[sibling] -= width
+
+        self._lefts[child_id] = 0
+        insort(self._roots, child_id)
+        self._refresh(parent_id)
+        return min(self._root_index(child_id), self._root_index(parent_id))
+
+    def positions(
+        self, technical_id: Optional[int] = None, first_root: int = 0
+    ) -> Iterator[Tuple[int, float, int]]:
+        """
+        Yields (technical id, x, depth) for every task, or only for the subtree of
+        technical_id if given. Without technical_id, the roots before the index
+        first_root and their subtrees are skipped.
+        """
+        if technical_id is None:
+            stack = []
+            left = sum(self._widths[root] for root in self._roots[:first_root])
+            for root in self._roots[first_root:]:
+                stack.append((root, left, 0))
+                left += self._widths[root]
+            stack.reverse()
+        else:
+            stack = [(technical_id, *self._subtree_origin(technical_id))]
+
+        while stack:
+            technical_id, left, depth = stack.pop()
+            yield technical_id, left + self._centers[technical_id], depth
+            children = [
+                (child, left + self._lefts[child], depth + 1)
+                for child in self.store.iter_children(technical_id)
+            ]
+            children.reverse()
+            stack.extend(children)
+
+    def position(self, technical_id: int) -> Tuple[float, int]:
+        left, depth = self._subtree_origin(technical_id)
+        return left + self._centers[technical_id], depth
+
+    def _root_index(self, technical_id: int) -> int:
+        parent_id = self.store.parent(technical_id)
+        while parent_id is not None:
+            technical_id, parent_id = parent_id, self.store.parent(parent_id)
+        return bisect_left(self._roots, technical_id)
+
+    def _subtree_origin(self, technical_id: int) -> Tuple[int, int]:
+        left = 0
+        depth = 0
+        parent_id = self.store.parent(technical_id)
+        while parent_id is not None:
+            left += self._lefts[technical_id]
+            depth += 1
+            technical_id, parent_id = parent_id, self.store.parent(parent_id)
+        for root in self._roots:
+            if root == technical_id:
+                break
+            left += self._widths[root]
+        return left, depth
+
+    def _refresh(self, technical_id: int) -> None:
+        while True:
+            old_width = self._widths[technical_id]
+            old_center = self._centers[technical_id]
+            self._place_from_ends(technical_id)
+            delta = self._widths[technical_id] - old_width
+            if not delta and self._centers[technical_id] == old_center:
+                return
+
+            parent_id = self.store.parent(technical_id)
+            if parent_id is None:
+                return
+            if delta:
+                sibling = self.store.next_sibling(technical_id)
+                while sibling is not None:
+                    self._lefts[sibling] += delta
+                    sibling = self.store.next_sibling(sibling)
+            technical_id = parent_id
+
+    def _place_from_ends(self, technical_id: int) -> None:
+        """
+        Same as _place_children when the offsets of the children are already up to
+        date: only the first and last children are looked at.
+        """
+        first_id = self.store.first_child(technical_id)
+        last_id = self.store.last_child(technical_id)
+        if first_id is None:
+            self._widths[technical_id] = 1
+            self._centers[technical_id] = 0
+            return
+
+        first_center = self._lefts[first_id] + self._centers[first_id]
+        last_center = self._lefts[last_id] + self._centers[last_id]
+        self._widths[technical_id] = self._lefts[last_id] + self._widths[last_id]
+        self._centers[technical_id] = (first_center + last_center) / 2
+
+    def _place_children(self, technical_id: int) -> None:
+        """
+        Computes the width and center of a task from its children, whose own widths
+        and centers are up to date. Also sets the offsets of the children.
+        """
+        left = 0
+        first_center: Optional[float] = None
+        last_center = 0.0
+        for child in self.store.iter_children(technical_id):
+            self._lefts[child] = left
+            last_center = left + self._centers[child]
+            if first_center is None:
+                first_center = last_center
+            left += self._widths[child]
+
+        if first_center is None:
+            self._widths[technical_id] = 1
+            self._centers[technical_id] = 0
+        else:
+            self._widths[technical_id] = left
+            self._centers[technical_id] = (first_center + last_center) / 2
+
+    def _grow(self, technical_id: int) -> None:
+        missing = technical_id + 1 - len(self._widths)
+        if missing > 0:
+            self._widths.extend([1] * missing)
+            self._lefts.extend([0] * missing)
+            self._centers.extend([0.0] * missing)
+
+
+class NodeGrid:
+    """
+    Uniform grid over the rectangles of the laid out tasks, in canvas coordinates,
+    to find the task under a point without looking at the others.
+
+    Cells are as large as the steps of the layout, so that a rectangle only covers a
+    few cells and a cell only holds a few rectangles. Each rectangle is kept in every
+    cell it covers, moving it costs those cells.
+    """
+
+    def __init__(self, cell_width: float, cell_height: float):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        # technical ids by cell, and the rectangle of every technical id.
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._rects: Dict[int, Tuple[float, float, float, float]] = {}
+
+    def clear(self) -> None:
+        self._cells = {}
+        self._rects = {}
+
+    def move(
+        self, technical_id: int, x0: float, y0: float, x1: float, y1: float
+    ) -> None:
+        """Puts the task at the rectangle from (x0, y0), included, to (x1, y1)."""
+        self.remove(technical_id)
+        self._rects[technical_id] = (x0, y0, x1, y1)
+        for cell in self._covered_cells(x0, y0, x1, y1):
+            self._cells.setdefault(cell, []).append(technical_id)
+
+    def remove(self, technical_id: int) -> None:
+        rect = self._rects.pop(technical_id, None)
+        if rect is None:
+            return
+        for cell in self._covered_cells(*rect):
+            technical_ids = self._cells[cell]
+            technical_ids.remove(technical_id)
+            if not technical_ids:
+                del self._cells[cell]
+
+    def at(self, x: float, y: float) -> Optional[int]:
+        """The task whose rectangle holds the point, if any."""
+        cell = (math.floor(x / self.cell_width), math.floor(y / self.cell_height))
+        for technical_id in self._cells.get(cell, ()):
+            x0, y0, x1, y1 = self._rects[technical_id]
+            if x0 <= x < x1 and y0 <= y < y1:
+                return technical_id
+        return None
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> Dict[int, None]:
+        """The tasks whose rectangle overlaps the one from (x0, y0) to (x1, y1)."""
+        found: Dict[int, None] = {}
+        rects = self._rects
+        for cell in self._covered_cells(x0, y0, x1, y1):
+            for technical_id in self._cells.get(cell, ()):
+                if technical_id in found:
+                    continue
+                task_x0, task_y0, task_x1, task_y1 = rects[technical_id]
+                if task_x0 < x1 and task_x1 > x0 and task_y0 < y1 and task_y1 > y0:
+                    found[technical_id] = None
+        return found
+
+    def _covered_cells(
+        self, x0: float, y0: float, x1: float, y1: float
+    ) -> Iterator[Tuple[int, int]]:
+        for column in range(
+            math.floor(x0 / self.cell_width), math.ceil(x1 / self.cell_width)
+        ):
+            for row in range(
+                math.floor(y0 / self.cell_height), math.ceil(y1 / self.cell_height)
+            ):
+                yield column, row